@@ -1,23 +1,32 @@
 # app_pdf_studio.py
 APP_VERSION = "2.0.0"
 
+import importlib.util
+import io
+import math
+import multiprocessing
 import os
 import threading
+import time
 import webbrowser
+from array import array
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 
 import customtkinter as ctk
 from PIL import Image, ImageOps, ImageTk, ImageDraw
-import fitz  # PyMuPDF
-from pypdf import PdfReader, PdfWriter
+from render_cache import (THUMB_BOX_KEY, LruCache, get_doc_pool, get_thumb_cache, image_nbytes,
+                          thumbnail_content)
+from page_export import (CONTAINERS, ExportCancelled, ExportManifest, ExportOptions, ExportStats,
+                         check_options, export_container, export_page, export_pages)
+from page_merge import MERGE_ENGINES, MergeCancelled, coalesce_ranges, run_merge
+from page_render import render_page
 
-try:
-    from rapidocr_onnxruntime import RapidOCR
-    import numpy as np
-    OCR_AVAILABLE = True
-except ImportError:
-    OCR_AVAILABLE = False
+# El OCR (onnxruntime) se importa al usarlo: los procesos hijos de exportación,
+# fusión y render reimportan el script principal y no deben cargarlo
+OCR_AVAILABLE = importlib.util.find_spec("rapidocr_onnxruntime") is not None
 
 try:
     from tkinterdnd2 import DND_FILES, TkinterDnD
@@ -44,9 +53,87 @@ def make_square_thumbnail(im: Image.Image, size=(72, 72), bg="#23293a") -> Image
     x = (size[0] - thumb.size[0]) // 2
     y = (size[1] - thumb.size[1]) // 2
     canvas.paste(thumb, (x, y))
+    canvas.info[THUMB_BOX_KEY] = f"{x},{y},{x + thumb.size[0]},{y + thumb.size[1]}"
     return canvas
 
 
+def load_image_thumbnail(path, size=(76, 76), bg="#1d2433") -> Image.Image:
+    """Miniatura cuadrada decodificando a resolución reducida (draft JPEG)."""
+    def render():
+        with Image.open(path) as im:
+            # Para JPEG, draft() escala en el propio decodificador DCT (1/2..1/8)
+            im.draft("RGB", size)
+            im = ImageOps.exif_transpose(im)
+            im.thumbnail(size)
+            return make_square_thumbnail(im.convert("RGB"), size=size, bg=bg)
+
+    return get_thumb_cache().get_or_create(path, 0, size[0], render)
+
+
+def load_image_preview(path, box):
+    """(imagen reducida a box con draft JPEG, tamaño completo ya orientado por EXIF)."""
+    with Image.open(path) as im:
+        full = im.size
+        if im.getexif().get(0x0112) in (5, 6, 7, 8):  # rotada 90°/270°
+            full = full[::-1]
+        im.draft("RGB", box)
+        im = ImageOps.exif_transpose(im)
+        im.thumbnail(box, Image.Resampling.LANCZOS)
+        return im.convert("RGB"), full
+
+
+def image_renderer(path):
+    """render(clip, escala) sobre la imagen completa, decodificada la primera vez que se pide."""
+    state = {}
+
+    def render(clip, scale, stale=None):
+        im = state.get("im")
+        if im is None:
+            with Image.open(path) as raw:
+                im = state["im"] = ImageOps.exif_transpose(raw).convert("RGB")
+        x0, y0, x1, y1 = clip
+        size = (max(1, round((x1 - x0) * scale)), max(1, round((y1 - y0) * scale)))
+        return im.resize(size, Image.Resampling.LANCZOS, box=clip)
+
+    return render
+
+
+def render_page_thumbnail(pdf_path, page_idx, scale, size=(76, 76), bg="#1d2433", stale=None):
+    """Miniatura de una página renderizada en un proceso hijo (None si quedó obsoleta)."""
+    im = render_page(pdf_path, page_idx, scale, stale=stale)
+    return make_square_thumbnail(im, size=size, bg=bg) if im is not None else None
+
+
+def cached_page_thumbnail(pdf_path, page_idx, scale, size=(76, 76), stale=None):
+    """Miniatura de página leída primero de la caché en disco compartida."""
+    cache = get_thumb_cache()
+    thumb = cache.get(pdf_path, page_idx, size[0], scale)
+    if thumb is None:
+        thumb = render_page_thumbnail(pdf_path, page_idx, scale, size=size, stale=stale)
+        if thumb is not None:
+            cache.put(pdf_path, page_idx, size[0], thumb, scale)
+    return thumb
+
+
+def pdf_page_renderer(pdf_path, page_idx):
+    """(measure, render) de una página para ZoomablePreview.set_renderer; no abre el PDF al crearse."""
+    def render(clip, scale, stale=None):
+        return render_page(pdf_path, page_idx, scale, clip=clip, stale=stale)
+
+    def measure():
+        with get_doc_pool().document(pdf_path) as doc:
+            rect = doc[page_idx].rect
+        return rect.width, rect.height
+
+    return measure, render
+
+
+def cached_thumbnail_preview(path, page_idx, scale=None, size=76):
+    """Miniatura cacheada en disco, sin el relleno, como vista previa provisional (o None)."""
+    thumb = get_thumb_cache().get(path, page_idx, size, scale)
+    return thumbnail_content(thumb) if thumb is not None else None
+
+
 def normalize_image_for_pdf(im: Image.Image) -> Image.Image:
     im = ImageOps.exif_transpose(im)
     if im.mode in ("RGBA", "LA"):
@@ -61,6 +148,134 @@ def normalize_image_for_pdf(im: Image.Image) -> Image.Image:
     return im.convert("RGB")
 
 
+def jpeg_passthrough_colorspace(im: Image.Image):
+    """Espacio de color PDF si el JPEG puede embeberse tal cual; None si hay que recodificar."""
+    if im.format != "JPEG" or im.mode not in ("RGB", "L"):
+        return None
+    if im.info.get("progressive") or im.info.get("progression"):
+        return None
+    try:
+        if im.getexif().get(0x0112, 1) != 1:  # Orientation
+            return None
+    except Exception:
+        return None
+    return "DeviceGray" if im.mode == "L" else "DeviceRGB"
+
+
+class ImagePdfWriter:
+    """Escribe un PDF de imágenes página a página directamente al archivo."""
+
+    def __init__(self, path, resolution=72.0):
+        self.path = path
+        self.resolution = resolution
+        self._f = open(path, "wb")
+        self._offsets = [None, None]  # 1 = Catalog, 2 = Pages
+        self._page_ids = []
+        self._f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    @property
+    def page_count(self):
+        return len(self._page_ids)
+
+    def _reserve(self):
+        self._offsets.append(None)
+        return len(self._offsets)
+
+    def _begin(self, num):
+        self._offsets[num - 1] = self._f.tell()
+        self._f.write(b"%d 0 obj\n" % num)
+
+    def _write_obj(self, num, body: bytes):
+        self._begin(num)
+        self._f.write(body)
+        self._f.write(b"\nendobj\n")
+
+    def _write_stream_obj(self, num, header: bytes, chunks):
+        self._begin(num)
+        self._f.write(header)
+        self._f.write(b"\nstream\n")
+        for chunk in chunks:
+            self._f.write(chunk)
+        self._f.write(b"\nendstream\nendobj\n")
+
+    def add_jpeg(self, chunks, length, width, height, colorspace="DeviceRGB"):
+        """Agrega una página con datos JPEG ya codificados (iterable de bytes)."""
+        img_id = self._reserve()
+        header = (b"<< /Type /XObject /Subtype /Image /Width %d /Height %d "
+                  b"/ColorSpace /%s /BitsPerComponent 8 /Filter /DCTDecode /Length %d >>"
+                  % (width, height, colorspace.encode("ascii"), length))
+        self._write_stream_obj(img_id, header, chunks)
+
+        pw = width * 72.0 / self.resolution
+        ph = height * 72.0 / self.resolution
+        content = b"q %.4f 0 0 %.4f 0 0 cm /Im0 Do Q" % (pw, ph)
+        content_id = self._reserve()
+        self._write_stream_obj(content_id, b"<< /Length %d >>" % len(content), [content])
+
+        procset = b"/ImageB" if colorspace == "DeviceGray" else b"/ImageC"
+        page_id = self._reserve()
+        self._write_obj(page_id, (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.4f %.4f] "
+            b"/Resources << /ProcSet [/PDF %s] /XObject << /Im0 %d 0 R >> >> "
+            b"/Contents %d 0 R >>" % (pw, ph, procset, img_id, content_id)))
+        self._page_ids.append(page_id)
+
+    def add_jpeg_file(self, path, width, height, colorspace="DeviceRGB"):
+        """Embebe los bytes JPEG originales sin recodificar (passthrough DCT)."""
+        with open(path, "rb") as f:
+            length = os.fstat(f.fileno()).st_size
+            chunks = iter(lambda: f.read(1 << 20), b"")
+            self.add_jpeg(chunks, length, width, height, colorspace)
+
+    def add_image(self, im: Image.Image):
+        """Codifica una imagen RGB/L como JPEG y la agrega como página."""
+        colorspace = "DeviceGray" if im.mode == "L" else "DeviceRGB"
+        if im.mode not in ("RGB", "L"):
+            im = im.convert("RGB")
+        buf = io.BytesIO()
+        im.save(buf, "JPEG")
+        data = buf.getvalue()
+        buf.close()
+        self.add_jpeg([data], len(data), im.size[0], im.size[1], colorspace)
+
+    def close(self):
+        if self._f is None:
+            return
+        kids = b" ".join(b"%d 0 R" % n for n in self._page_ids)
+        self._write_obj(2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self._page_ids)))
+        self._write_obj(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+        xref_pos = self._f.tell()
+        self._f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(self._offsets) + 1))
+        for off in self._offsets:
+            self._f.write(b"%010d 00000 n \n" % off)
+        self._f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                      % (len(self._offsets) + 1, xref_pos))
+        self._f.close()
+        self._f = None
+
+    def abort(self):
+        """Cierra y elimina el archivo parcial."""
+        if self._f is None:
+            return
+        self._f.close()
+        self._f = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
 def parse_dropped_files(widget, data: str):
     try:
         paths = list(widget.tk.splitlist(data))
@@ -148,17 +363,349 @@ def setup_treeview_dark_style(root):
     )
 
 
+# -------------------- Lista compacta de páginas -------------------- #
+PageRef = namedtuple("PageRef", "path first last", defaults=(0, 0))
+
+
+class PageList:
+    """Secuencia compacta de PageRef(ruta, desde, hasta) guardada en arrays de enteros."""
+
+    def __init__(self):
+        self._paths = []       # id -> ruta
+        self._path_ids = {}    # ruta -> id
+        self._src = array("I")
+        self._first = array("I")
+        self._last = array("I")
+
+    def __len__(self):
+        return len(self._src)
+
+    def __getitem__(self, i):
+        return PageRef(self._paths[self._src[i]], self._first[i], self._last[i])
+
+    def __iter__(self):
+        paths = self._paths
+        for src, first, last in zip(self._src, self._first, self._last):
+            yield PageRef(paths[src], first, last)
+
+    def _intern(self, path):
+        pid = self._path_ids.get(path)
+        if pid is None:
+            pid = self._path_ids[path] = len(self._paths)
+            self._paths.append(path)
+        return pid
+
+    def insert(self, i, ref):
+        self._src.insert(i, self._intern(ref.path))
+        self._first.insert(i, ref.first)
+        self._last.insert(i, ref.last)
+
+    def append(self, ref):
+        self.insert(len(self._src), ref)
+
+    def pop(self, i):
+        return PageRef(self._paths[self._src.pop(i)], self._first.pop(i), self._last.pop(i))
+
+    def move(self, frm, to):
+        self.insert(to, self.pop(frm))
+
+    def clear(self):
+        self._paths.clear()
+        self._path_ids.clear()
+        del self._src[:], self._first[:], self._last[:]
+
+
+# -------------------- Lista incremental sobre Treeview -------------------- #
+class TreeListModel:
+    """PageList reflejada en un ttk.Treeview con movimientos, altas y bajas fila a fila."""
+
+    def __init__(self, tree, scrollbar, label_fn, on_visible_change=None, numbered=True):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.records = PageList()
+        self._ids = array("I")        # número de iid de cada fila
+        self._numbered = array("i")   # índice mostrado en la etiqueta (-1: ninguno)
+        self._label_fn = label_fn
+        self._show_numbers = numbered
+        self._on_visible_change = on_visible_change
+        self._next_id = 0
+        self.page_count = 0
+        self._visible_job = None
+        tree.configure(yscrollcommand=self._on_yscroll)
+        tree.bind("<Configure>", self.schedule_visible, add="+")
+
+    def __len__(self):
+        return len(self.records)
+
+    def iid_at(self, idx):
+        return f"r{self._ids[idx]}"
+
+    def index_of(self, iid):
+        n = int(iid[1:])
+        rows = self.visible_range(margin=2)
+        try:
+            return self._ids.index(n, rows.start, rows.stop)
+        except ValueError:
+            return self.tree.index(iid)
+
+    def selected_index(self):
+        sel = self.tree.selection()
+        if not sel:
+            return None
+        return self.index_of(sel[0])
+
+    def _text(self, idx, rec):
+        if not self._show_numbers:
+            return self._label_fn(rec)
+        return f"{idx + 1:03d}. {self._label_fn(rec)}"
+
+    def extend(self, recs, image):
+        """Agrega PageRefs al final; image(rec) da la imagen inicial de cada fila."""
+        return self.insert(len(self.records), recs, image)
+
+    def insert(self, idx, recs, image):
+        """Inserta PageRefs a partir de la posición idx. Devuelve sus iids."""
+        new_iids = []
+        for rec in recs:
+            n = self._next_id
+            self._next_id += 1
+            iid = f"r{n}"
+            self.tree.insert("", idx, iid=iid, text=self._text(idx, rec), image=image(rec))
+            self.records.insert(idx, rec)
+            self._ids.insert(idx, n)
+            self._numbered.insert(idx, idx)
+            self.page_count += rec.last - rec.first + 1
+            new_iids.append(iid)
+            idx += 1
+        self.relabel_visible()
+        self.schedule_visible()
+        return new_iids
+
+    def move(self, frm, to):
+        if frm == to:
+            return
+        self.records.move(frm, to)
+        n = self._ids.pop(frm)
+        self._ids.insert(to, n)
+        self._numbered.insert(to, self._numbered.pop(frm))
+        self.tree.move(f"r{n}", "", to)
+        self.relabel_visible()
+
+    def pop(self, idx):
+        rec = self.records.pop(idx)
+        n = self._ids.pop(idx)
+        self._numbered.pop(idx)
+        self.page_count -= rec.last - rec.first + 1
+        self.tree.delete(f"r{n}")
+        self.relabel_visible()
+        return rec
+
+    def clear(self):
+        self.tree.delete(*self.tree.get_children())
+        self.records.clear()
+        del self._ids[:], self._numbered[:]
+        self.page_count = 0
+
+    def select(self, idx):
+        iid = self.iid_at(idx)
+        self.tree.selection_set(iid)
+        self.tree.focus(iid)
+        self.tree.see(iid)
+
+    def visible_range(self, margin=0):
+        n = len(self.records)
+        if not n:
+            return range(0)
+        # Las filas tienen altura fija: el yview da directamente qué índices se ven
+        top, bottom = (float(f) for f in self.tree.yview())
+        first = int(top * n + 0.5)
+        last = min(n - 1, math.ceil(bottom * n) - 1)
+        return range(max(0, first - margin), min(n, last + margin + 1))
+
+    def relabel_visible(self):
+        for i in self.visible_range():
+            if self._numbered[i] != i:
+                self.tree.item(self.iid_at(i), text=self._text(i, self.records[i]))
+                self._numbered[i] = i
+
+    def _on_yscroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.schedule_visible()
+
+    def schedule_visible(self, _=None):
+        if self._visible_job is None:
+            self._visible_job = self.tree.after(30, self._visible_changed)
+
+    def _visible_changed(self):
+        self._visible_job = None
+        self.relabel_visible()
+        if self._on_visible_change:
+            self._on_visible_change()
+
+
+# -------------------- Miniaturas virtualizadas -------------------- #
+class VirtualThumbnails:
+    """Miniaturas de las filas de un TreeListModel: solo las visibles, renderizadas en segundo plano."""
+
+    CACHE_ITEMS = 600    # PhotoImages vivas como máximo
+    PREFETCH_ROWS = 8    # filas extra por encima/debajo de lo visible
+
+    def __init__(self, model, scale, thread_name="thumb"):
+        self.model = model
+        self.scale = scale
+        self.placeholder = ImageTk.PhotoImage(Image.new("RGB", (76, 76), "#1d2433"))
+        self._thread_name = thread_name
+        self._thumbs = LruCache(max_items=self.CACHE_ITEMS, on_evict=self._on_evicted)
+        self._shown = {}          # iid -> (pdf_path, page_idx) con miniatura real
+        self._pending = set()
+        self._failed = set()
+        self._wanted = frozenset()
+        self._gen = 0             # cambia en reset(): invalida el trabajo pendiente
+        self._worker = None
+
+    def update(self):
+        """Pone las miniaturas ya hechas y encarga las que faltan en las filas visibles."""
+        model, tree = self.model, self.model.tree
+        wanted = set()
+        for i in model.visible_range(margin=self.PREFETCH_ROWS):
+            rec = model.records[i]
+            key = (rec.path, rec.first)
+            iid = model.iid_at(i)
+            if self._shown.get(iid) == key:
+                continue
+            thumb = self._thumbs.get(key)
+            if thumb is not None:
+                tree.item(iid, image=thumb)
+                self._shown[iid] = key
+                continue
+            if iid in self._shown:
+                del self._shown[iid]
+                tree.item(iid, image=self.placeholder)
+            if key not in self._failed:
+                wanted.add(key)
+
+        self._wanted = frozenset(wanted)
+        if not wanted - self._pending:
+            return
+        if self._worker is None:
+            self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix=self._thread_name)
+        gen = self._gen
+        for key in sorted(wanted - self._pending):
+            self._pending.add(key)
+            fut = self._worker.submit(self._render_job, key, gen)
+            fut.add_done_callback(lambda f, k=key: self._on_done(f, k, gen))
+
+    def _render_job(self, key, gen):
+        # Hilo de miniaturas: omitir filas que ya salieron de la vista o de la lista
+        if gen != self._gen or key not in self._wanted:
+            return None
+        pdf_path, page_idx = key
+        return cached_page_thumbnail(pdf_path, page_idx, self.scale,
+                                     stale=lambda: gen != self._gen or key not in self._wanted)
+
+    def _on_done(self, fut, key, gen):
+        if fut.cancelled():
+            return
+        failed = fut.exception() is not None
+        thumb = None if failed else fut.result()
+        try:
+            self.model.tree.after(0, lambda: self._apply(key, thumb, failed, gen))
+        except (RuntimeError, tk.TclError):
+            pass
+
+    def _apply(self, key, thumb_pil, failed, gen):
+        if gen != self._gen:
+            return
+        self._pending.discard(key)
+        if failed:
+            self._failed.add(key)
+            return
+        if thumb_pil is not None:
+            self._thumbs.put(key, ImageTk.PhotoImage(thumb_pil))
+        self.model.schedule_visible()
+
+    def _on_evicted(self, key, _photo):
+        # La PhotoImage expulsada deja de existir: volver al placeholder
+        tree = self.model.tree
+        for iid, shown in list(self._shown.items()):
+            if shown == key:
+                del self._shown[iid]
+                if tree.exists(iid):
+                    tree.item(iid, image=self.placeholder)
+
+    def forget(self, iid):
+        """Olvida una fila borrada del modelo."""
+        self._shown.pop(iid, None)
+
+    def reset(self):
+        self._gen += 1
+        self._pending.clear()
+        self._failed.clear()
+        self._wanted = frozenset()
+        self._thumbs.clear()
+        self._shown.clear()
+
+    def shutdown(self):
+        if self._worker is not None:
+            self._worker.shutdown(wait=False, cancel_futures=True)
+
+
 # -------------------- ZoomablePreview widget -------------------- #
+class MipmapPyramid:
+    """Reducciones sucesivas a la mitad de una imagen, generadas bajo demanda."""
+
+    MIN_SIDE = 64  # no se generan niveles más pequeños que esto
+    _LEVEL_MODES = ("L", "LA", "RGB", "RGBA")
+
+    def __init__(self, image):
+        self._levels = [image]
+
+    @property
+    def size(self):
+        return self._levels[0].size
+
+    def level(self, k):
+        while len(self._levels) <= k:
+            prev = self._levels[-1]
+            if prev.mode not in self._LEVEL_MODES:
+                prev = prev.convert({"1": "L", "P": "RGBA", "PA": "RGBA"}.get(prev.mode, "RGB"))
+            self._levels.append(prev.reduce(2))
+        return self._levels[k]
+
+    def level_for(self, scale):
+        """El nivel más pequeño que sigue siendo al menos tan grande como la imagen escalada."""
+        w, h = self.size
+        k = 0
+        while scale <= 0.5 ** (k + 1) and min(w, h) >> (k + 1) >= self.MIN_SIDE:
+            k += 1
+        return self.level(k)
+
+
 class ZoomablePreview(ctk.CTkFrame):
     """Canvas-based preview with zoom controls and scrollbars."""
 
     ZOOM_LEVELS = [0.25, 0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 3.0, 4.0]
+    VECTOR_ZOOM_LEVELS = ZOOM_LEVELS + [6.0, 8.0, 12.0, 16.0]
+    TILE = 512          # lado de cada tesela, en píxeles de pantalla
+    TILE_MARGIN = 256   # píxeles precargados alrededor de lo visible
 
     def __init__(self, master, placeholder="Selecciona un archivo", **kwargs):
         super().__init__(master, fg_color="#0f1420", corner_radius=12, **kwargs)
         self._pil_image = None
+        self._pyramid = None
+        self._renderer = None      # render(clip, escala, stale) -> imagen PIL del recorte
+        self._vector = False       # la fuente admite los zooms de VECTOR_ZOOM_LEVELS
+        self._source_size = None   # tamaño de la fuente a zoom 1 (píxeles o puntos)
         self._zoom = 1.0
-        self._tk_img = None
+        self._view_size = (0, 0)   # tamaño de la imagen al zoom actual
+        self._tile_src = None      # nivel de la pirámide del que salen las teselas
+        self._tiles = {}           # (columna, fila) -> (id en el canvas, PhotoImage, nítida)
+        self._tile_job = None
+        self._refine_worker = None
+        self._refine_gen = 0       # cambia con cada página/zoom: invalida teselas en curso
+        self._refine_futures = {}  # (columna, fila) -> Future de la tesela nítida
+        self._refine_wanted = frozenset()
+        self._source_gen = 0       # cambia con cada fuente: invalida un tamaño pendiente
         self._placeholder = placeholder
         self._build()
 
@@ -186,7 +733,9 @@ class ZoomablePreview(ctk.CTkFrame):
         self.canvas = tk.Canvas(container, bg="#0f1420", highlightthickness=0)
         self.v_scroll = ttk.Scrollbar(container, orient="vertical", command=self.canvas.yview)
         self.h_scroll = ttk.Scrollbar(container, orient="horizontal", command=self.canvas.xview)
-        self.canvas.configure(xscrollcommand=self.h_scroll.set, yscrollcommand=self.v_scroll.set)
+        self.canvas.configure(
+            xscrollcommand=lambda *a: self._on_view_change(self.h_scroll, *a),
+            yscrollcommand=lambda *a: self._on_view_change(self.v_scroll, *a))
 
         self.canvas.grid(row=0, column=0, sticky="nsew")
         self.v_scroll.grid(row=0, column=1, sticky="ns")
@@ -199,50 +748,241 @@ class ZoomablePreview(ctk.CTkFrame):
         self.canvas.bind("<MouseWheel>", self._on_scroll_plain)
         self.canvas.bind("<Configure>", self._on_resize)
 
-    def set_image(self, pil_img):
+    def set_image(self, pil_img, max_zoom=4.0):
+        self._source_gen += 1
+        self._cancel_refinement()
         self._pil_image = pil_img
-        self._zoom = self._calc_fit_zoom()
+        self._pyramid = MipmapPyramid(pil_img) if pil_img is not None else None
+        self._renderer = None
+        self._source_size = pil_img.size if pil_img is not None else None
+        self._zoom = self._calc_fit_zoom(max_zoom=max_zoom)
         self._refresh()
 
+    def set_renderer(self, size, render, preview=None, on_size=None, vector=True):
+        """Fuente vectorial de tamaño size rasterizada por teselas con render(clip, escala)."""
+        self._source_gen += 1
+        self._cancel_refinement()
+        pending = callable(size)
+        self._pil_image = None
+        self._pyramid = MipmapPyramid(preview) if preview is not None else None
+        self._renderer = None if pending else render
+        self._vector = vector
+        if pending:
+            # Hasta conocer el tamaño solo se ve preview, ajustada a la vista sin tope de zoom
+            self._source_size = preview.size if preview is not None else None
+            self._tiles.clear()
+            self.canvas.delete("all")
+            self._zoom = self._calc_fit_zoom(max_zoom=None)
+        else:
+            self._source_size = size
+            self._zoom = self._calc_fit_zoom()
+        self._refresh()
+        if pending:
+            gen = self._source_gen
+            fut = self._worker().submit(size)
+            fut.add_done_callback(
+                lambda f: self._on_size_done(f, gen, render, preview, on_size, vector))
+        elif on_size is not None:
+            on_size(size)
+
+    def _on_size_done(self, fut, gen, render, preview, on_size, vector):
+        if fut.cancelled():
+            return
+        size = None if fut.exception() is not None else fut.result()
+        try:
+            self.after(0, lambda: self._apply_size(gen, size, render, preview, on_size, vector))
+        except (RuntimeError, tk.TclError):
+            pass
+
+    def _apply_size(self, gen, size, render, preview, on_size, vector):
+        if gen != self._source_gen:
+            return
+        if size is None:
+            self.clear()
+        else:
+            self.set_renderer(size, render, preview, on_size, vector)
+
     def clear(self):
+        self._source_gen += 1
+        self._cancel_refinement()
         self._pil_image = None
-        self._tk_img = None
+        self._pyramid = None
+        self._renderer = None
+        self._source_size = None
+        self._tile_src = None
+        self._tiles.clear()
         self.canvas.delete("all")
         self._placeholder_id = self.canvas.create_text(
             200, 150, text=self._placeholder, fill="#93a1ba", font=("Segoe UI", 12))
         self.zoom_label.configure(text="Ajustar")
 
-    def _calc_fit_zoom(self):
-        if not self._pil_image:
+    def _calc_fit_zoom(self, max_zoom=4.0):
+        if not self._source_size:
             return 1.0
         cw = max(100, self.canvas.winfo_width())
         ch = max(100, self.canvas.winfo_height())
-        w, h = self._pil_image.size
+        w, h = self._source_size
         if w <= 0 or h <= 0:
             return 1.0
-        return min(cw / w, ch / h, 4.0)
+        fit = min(cw / w, ch / h)
+        return fit if max_zoom is None else min(fit, max_zoom)
 
     def _refresh(self):
-        if not self._pil_image:
+        if not self._source_size:
             return
-        w, h = self._pil_image.size
+        self._cancel_refinement()
+        w, h = self._source_size
         nw, nh = max(1, int(w * self._zoom)), max(1, int(h * self._zoom))
-        resized = self._pil_image.resize((nw, nh), Image.Resampling.LANCZOS)
-        self._tk_img = ImageTk.PhotoImage(resized)
+        self._view_size = (nw, nh)
+        self._tile_src = (self._pyramid.level_for(nw / self._pyramid.size[0])
+                          if self._pyramid else None)
+        self._tiles.clear()
         self.canvas.delete("all")
-        self.canvas.create_image(0, 0, anchor="nw", image=self._tk_img)
         self.canvas.configure(scrollregion=(0, 0, nw, nh))
         self.zoom_label.configure(text=f"{self._zoom*100:.0f}%")
+        self._update_tiles()
+
+    def _on_view_change(self, scrollbar, first, last):
+        scrollbar.set(first, last)
+        self._schedule_tiles()
+
+    def _schedule_tiles(self):
+        if self._tile_job is None and self._source_size:
+            self._tile_job = self.after_idle(self._update_tiles)
+
+    def _tile_range(self, margin):
+        nw, nh = self._view_size
+        t = self.TILE
+        x0 = self.canvas.canvasx(0) - margin
+        y0 = self.canvas.canvasy(0) - margin
+        x1 = self.canvas.canvasx(self.canvas.winfo_width()) + margin
+        y1 = self.canvas.canvasy(self.canvas.winfo_height()) + margin
+        cols = range(max(0, int(x0 // t)), min(-(-nw // t), int(x1 // t) + 1))
+        rows = range(max(0, int(y0 // t)), min(-(-nh // t), int(y1 // t) + 1))
+        return {(c, r) for r in rows for c in cols}
+
+    def _update_tiles(self):
+        """Crea las teselas que entran en la vista (más el margen) y suelta las que salen."""
+        self._tile_job = None
+        if not self._source_size:
+            return
+        nw, nh = self._view_size
+        t = self.TILE
+        wanted = self._tile_range(self.TILE_MARGIN)
+        visible = self._tile_range(0)
+
+        for key in [k for k in self._tiles if k not in wanted]:
+            item = self._tiles.pop(key)[0]
+            if item is not None:
+                self.canvas.delete(item)
+            fut = self._refine_futures.pop(key, None)
+            if fut is not None:
+                fut.cancel()
+
+        # Primero lo visible, luego el margen
+        to_refine = []
+        for c, r in sorted(wanted - self._tiles.keys(), key=lambda k: (k not in visible, k[1], k[0])):
+            tx0, ty0 = c * t, r * t
+            tx1, ty1 = min(nw, tx0 + t), min(nh, ty0 + t)
+            item = photo = None
+            if self._tile_src is not None:
+                photo = ImageTk.PhotoImage(self._resample_tile(tx0, ty0, tx1, ty1))
+                item = self.canvas.create_image(tx0, ty0, anchor="nw", image=photo)
+            # Sin renderer, o si la pirámide ya llega a este zoom, la tesela es definitiva
+            sharp = self._renderer is None or (self._pyramid is not None
+                                               and nw <= self._pyramid.size[0])
+            self._tiles[(c, r)] = (item, photo, sharp)
+            if not sharp:
+                to_refine.append(((c, r), (tx0, ty0, tx1, ty1)))
+        self._refine_wanted = frozenset(k for k, tile in self._tiles.items() if not tile[2])
+        for key, box in to_refine:
+            self._request_refine(key, box)
+
+    def _resample_tile(self, x0, y0, x1, y1):
+        """Tesela de la vista (coordenadas en píxeles al zoom actual) a partir de la pirámide."""
+        src = self._tile_src
+        nw, nh = self._view_size
+        fx, fy = src.width / nw, src.height / nh
+        if fx == fy == 1:
+            return src.crop((x0, y0, x1, y1))
+        # box en coordenadas del nivel: el filtro usa los píxeles vecinos, sin costuras
+        return src.resize((x1 - x0, y1 - y0), Image.Resampling.LANCZOS,
+                          box=(x0 * fx, y0 * fy, x1 * fx, y1 * fy))
+
+    # ---- Teselas nítidas en segundo plano ----
+    def _worker(self):
+        if self._refine_worker is None:
+            self._refine_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preview-tile")
+        return self._refine_worker
+
+    def _request_refine(self, key, box):
+        gen = self._refine_gen
+        fut = self._worker().submit(self._render_tile_job, gen, key, box,
+                                         self._zoom, self._renderer)
+        self._refine_futures[key] = fut
+        fut.add_done_callback(lambda f: self._on_tile_done(f, gen, key))
+
+    def _render_tile_job(self, gen, key, box, zoom, render):
+        # Hilo de trabajo: omitir teselas de otra página/zoom o que salieron de la vista
+        if gen != self._refine_gen or key not in self._refine_wanted:
+            return None
+        x0, y0, x1, y1 = box
+        tile = render((x0 / zoom, y0 / zoom, x1 / zoom, y1 / zoom), zoom,
+                      stale=lambda: gen != self._refine_gen or key not in self._refine_wanted)
+        if tile is None:
+            return None
+        size = (x1 - x0, y1 - y0)
+        # El rasterizador redondea el recorte a píxeles enteros
+        return tile if tile.size == size else tile.resize(size, Image.Resampling.BILINEAR)
+
+    def _on_tile_done(self, fut, gen, key):
+        if fut.cancelled() or fut.exception() is not None:
+            return
+        tile = fut.result()
+        if tile is None:
+            return
+        try:
+            self.after(0, lambda: self._apply_tile(gen, key, tile))
+        except (RuntimeError, tk.TclError):
+            pass
+
+    def _apply_tile(self, gen, key, tile):
+        if gen != self._refine_gen or key not in self._tiles:
+            return
+        self._refine_futures.pop(key, None)
+        item = self._tiles[key][0]
+        photo = ImageTk.PhotoImage(tile)
+        if item is None:
+            item = self.canvas.create_image(key[0] * self.TILE, key[1] * self.TILE,
+                                            anchor="nw", image=photo)
+        else:
+            self.canvas.itemconfigure(item, image=photo)
+        self._tiles[key] = (item, photo, True)
+
+    def _cancel_refinement(self):
+        self._refine_gen += 1
+        for fut in self._refine_futures.values():
+            fut.cancel()
+        self._refine_futures.clear()
+        self._refine_wanted = frozenset()
+
+    def destroy(self):
+        if self._refine_worker is not None:
+            self._refine_worker.shutdown(wait=False, cancel_futures=True)
+        super().destroy()
+
+    def _zoom_levels(self):
+        return self.VECTOR_ZOOM_LEVELS if self._renderer is not None and self._vector else self.ZOOM_LEVELS
 
     def zoom_in(self):
-        for z in self.ZOOM_LEVELS:
+        for z in self._zoom_levels():
             if z > self._zoom + 0.01:
                 self._zoom = z
                 self._refresh()
                 return
 
     def zoom_out(self):
-        for z in reversed(self.ZOOM_LEVELS):
+        for z in reversed(self._zoom_levels()):
             if z < self._zoom - 0.01:
                 self._zoom = z
                 self._refresh()
@@ -264,18 +1004,34 @@ class ZoomablePreview(ctk.CTkFrame):
 
     def _on_resize(self, _):
         # Re-fit only if image is smaller than canvas (auto-fit behavior)
-        pass
+        self._schedule_tiles()
 
 
 # -------------------- Tab 1: Imágenes -> PDF -------------------- #
 class ImagesToPdfTab(ctk.CTkFrame):
     IMG_EXTS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp")
+    THUMB_WORKERS = min(8, os.cpu_count() or 2)
 
     def __init__(self, master):
         super().__init__(master)
-        self.records = []  # [{path, thumb_tk}]
+        self.list_model = None  # TreeListModel de PageRef(ruta)
         self._drag_from_index = None
 
+        # Miniaturas en segundo plano
+        self._thumb_pool = None
+        self._thumb_jobs = set()
+        self._thumb_gen = 0
+        self._row_thumbs = {}  # iid -> PhotoImage (mantiene viva la imagen de la fila)
+        self._placeholder_thumb = ImageTk.PhotoImage(Image.new("RGB", (76, 76), "#1d2433"))
+
+        # Vistas previas decodificadas (tamaño pantalla), LRU por ruta
+        # ruta -> (imagen reducida, tamaño completo)
+        self._preview_cache = LruCache(max_items=32, max_bytes=384 * 1024 * 1024,
+                                       sizeof=lambda entry: image_nbytes(entry[0]))
+        self._preview_pool = None
+        self._preview_pending = set()
+        self._preview_path = None
+
         self._build_ui()
         self._register_dnd_if_available()
 
@@ -316,7 +1072,7 @@ class ImagesToPdfTab(ctk.CTkFrame):
 
         scroll = ttk.Scrollbar(container, orient="vertical", command=self.tree.yview)
         scroll.grid(row=0, column=1, sticky="ns")
-        self.tree.configure(yscrollcommand=scroll.set)
+        self.list_model = TreeListModel(self.tree, scroll, lambda rec: os.path.basename(rec.path))
 
         self.tree.bind("<<TreeviewSelect>>", self.on_select)
         self.tree.bind("<ButtonPress-1>", self.on_drag_start)
@@ -376,47 +1132,77 @@ class ImagesToPdfTab(ctk.CTkFrame):
             self.add_image_paths(list(paths))
 
     def add_image_paths(self, paths):
-        added = 0
-        for path in paths:
-            try:
-                with Image.open(path) as im:
-                    im = ImageOps.exif_transpose(im).convert("RGB")
-                    thumb_pil = make_square_thumbnail(im, size=(76, 76), bg="#1d2433")
-                thumb_tk = ImageTk.PhotoImage(thumb_pil)
-                self.records.append({"path": path, "thumb": thumb_tk})
-                added += 1
-            except Exception:
-                continue
-        if added:
-            self.refresh_tree(select_index=len(self.records) - 1)
-
-    def refresh_tree(self, select_index=None):
-        self.tree.delete(*self.tree.get_children())
-        for i, rec in enumerate(self.records):
-            label = f"{i + 1:03d}. {os.path.basename(rec['path'])}"
-            self.tree.insert("", "end", iid=str(i), text=label, image=rec["thumb"])
-
-        self.count_label.configure(text=f"{len(self.records)} imágenes")
+        if not paths:
+            return
+        if self._thumb_pool is None:
+            self._thumb_pool = ThreadPoolExecutor(max_workers=self.THUMB_WORKERS,
+                                                  thread_name_prefix="img-thumb")
+        gen = self._thumb_gen
+        iids = self.list_model.extend([PageRef(path) for path in paths],
+                                      image=lambda _rec: self._placeholder_thumb)
+        for path, iid in zip(paths, iids):
+            fut = self._thumb_pool.submit(load_image_thumbnail, path)
+            self._thumb_jobs.add(fut)
+            fut.add_done_callback(lambda f, i=iid: self._on_thumb_done(f, i, gen))
+        self.refresh_selection(select_index=len(self.list_model) - 1)
+
+    def _on_thumb_done(self, fut, iid, gen):
+        # Se ejecuta en el hilo de trabajo: delegar al hilo de Tk
+        self._thumb_jobs.discard(fut)
+        if fut.cancelled():
+            return
+        err = fut.exception()
+        thumb = None if err else fut.result()
+        try:
+            self.after(0, lambda: self._apply_thumb(iid, thumb, gen))
+        except (RuntimeError, tk.TclError):
+            pass
 
-        if self.records:
+    def _apply_thumb(self, iid, thumb_pil, gen):
+        if gen != self._thumb_gen:
+            return
+        if not self.tree.exists(iid):
+            return
+        if thumb_pil is None:
+            # Archivo ilegible: se descarta como antes
+            idx = self.list_model.index_of(iid)
+            sel = self.list_model.selected_index()
+            self.list_model.pop(idx)
+            if sel is not None and sel > idx:
+                sel -= 1
+            self.refresh_selection(select_index=sel)
+            return
+        self._row_thumbs[iid] = ImageTk.PhotoImage(thumb_pil)
+        self.tree.item(iid, image=self._row_thumbs[iid])
+
+    def _cancel_thumb_jobs(self):
+        self._thumb_gen += 1
+        for fut in list(self._thumb_jobs):
+            fut.cancel()
+        self._thumb_jobs.clear()
+
+    def destroy(self):
+        self._cancel_thumb_jobs()
+        for pool in (self._thumb_pool, self._preview_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        super().destroy()
+
+    def refresh_selection(self, select_index=None):
+        n = len(self.list_model)
+        self.count_label.configure(text=f"{n} imágenes")
+
+        if n:
             if select_index is None:
                 select_index = 0
-            select_index = max(0, min(select_index, len(self.records) - 1))
-            self.tree.selection_set(str(select_index))
-            self.tree.focus(str(select_index))
-            self.tree.see(str(select_index))
+            select_index = max(0, min(select_index, n - 1))
+            self.list_model.select(select_index)
             self.show_preview(select_index)
         else:
             self.clear_preview()
 
     def get_selected_index(self):
-        sel = self.tree.selection()
-        if not sel:
-            return None
-        try:
-            return int(sel[0])
-        except Exception:
-            return None
+        return self.list_model.selected_index()
 
     def on_select(self, _=None):
         idx = self.get_selected_index()
@@ -424,23 +1210,77 @@ class ImagesToPdfTab(ctk.CTkFrame):
             self.show_preview(idx)
 
     def show_preview(self, idx):
-        if not (0 <= idx < len(self.records)):
+        records = self.list_model.records
+        if not (0 <= idx < len(records)):
             self.clear_preview()
             return
-        path = self.records[idx]["path"]
+        path = records[idx].path
+        # Prefetch de vecinos para que Subir/Bajar y el arrastre no esperen
+        for n in (idx + 1, idx - 1):
+            if 0 <= n < len(records):
+                self._request_preview(records[n].path)
+        if path == self._preview_path:
+            return
+        entry = self._preview_cache.get(path)
+        if entry is not None:
+            self._set_preview(path, entry)
+            return
+        self._preview_path = None
+        # Mientras se decodifica, la miniatura cacheada (si la hay) hace de vista
+        # previa, ajustada a la vista como lo estará la imagen real
+        stand_in = cached_thumbnail_preview(path, 0)
+        if stand_in is not None:
+            self.preview_widget.set_image(stand_in, max_zoom=None)
+        else:
+            self.preview_widget.clear()
+        self._request_preview(path)
+
+    def _preview_box(self):
+        return (max(800, self.winfo_screenwidth()), max(600, self.winfo_screenheight()))
+
+    def _request_preview(self, path):
+        if path in self._preview_cache or path in self._preview_pending:
+            return
+        if self._preview_pool is None:
+            self._preview_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="img-preview")
+        self._preview_pending.add(path)
+        fut = self._preview_pool.submit(load_image_preview, path, self._preview_box())
+        fut.add_done_callback(lambda f, p=path: self._on_preview_done(f, p))
+
+    def _on_preview_done(self, fut, path):
+        # Hilo de trabajo: guardar en la LRU y avisar al hilo de Tk
+        entry = None if fut.cancelled() or fut.exception() else fut.result()
+        if entry is not None:
+            self._preview_cache.put(path, entry)
         try:
-            with Image.open(path) as im:
-                im = ImageOps.exif_transpose(im).convert("RGB")
-                self.preview_widget.set_image(im.copy())
-        except Exception:
+            self.after(0, lambda: self._apply_preview(path, entry))
+        except (RuntimeError, tk.TclError):
+            pass
+
+    def _apply_preview(self, path, entry):
+        self._preview_pending.discard(path)
+        idx = self.get_selected_index()
+        if idx is None or self.list_model.records[idx].path != path:
+            return
+        if entry is None:
             self.preview_widget.clear()
+            return
+        self._set_preview(path, entry)
+
+    def _set_preview(self, path, entry):
+        # La imagen reducida cubre el zoom de ajuste; al ampliar más, las
+        # teselas salen de la imagen completa, decodificada solo entonces
+        im, full_size = entry
+        self._preview_path = path
+        self.preview_widget.set_renderer(full_size, image_renderer(path), preview=im, vector=False)
 
     def clear_preview(self):
+        self._preview_path = None
         self.preview_widget.clear()
 
     def on_drag_start(self, event):
         row = self.tree.identify_row(event.y)
-        self._drag_from_index = int(row) if row else None
+        self._drag_from_index = self.list_model.index_of(row) if row else None
 
     def on_drag_motion(self, event):
         if self._drag_from_index is None:
@@ -448,42 +1288,45 @@ class ImagesToPdfTab(ctk.CTkFrame):
         row = self.tree.identify_row(event.y)
         if not row:
             return
-        to_index = int(row)
+        to_index = self.list_model.index_of(row)
         frm = self._drag_from_index
         if to_index == frm:
             return
-        item = self.records.pop(frm)
-        self.records.insert(to_index, item)
+        self.list_model.move(frm, to_index)
         self._drag_from_index = to_index
-        self.refresh_tree(select_index=to_index)
+        self.refresh_selection(select_index=to_index)
 
     def remove_selected(self):
         idx = self.get_selected_index()
         if idx is None:
             return
-        self.records.pop(idx)
-        self.refresh_tree(select_index=max(0, idx - 1))
+        self._row_thumbs.pop(self.list_model.iid_at(idx), None)
+        self.list_model.pop(idx)
+        self.refresh_selection(select_index=max(0, idx - 1))
 
     def move_up(self):
         idx = self.get_selected_index()
         if idx is None or idx == 0:
             return
-        self.records[idx - 1], self.records[idx] = self.records[idx], self.records[idx - 1]
-        self.refresh_tree(select_index=idx - 1)
+        self.list_model.move(idx, idx - 1)
+        self.refresh_selection(select_index=idx - 1)
 
     def move_down(self):
         idx = self.get_selected_index()
-        if idx is None or idx >= len(self.records) - 1:
+        if idx is None or idx >= len(self.list_model) - 1:
             return
-        self.records[idx + 1], self.records[idx] = self.records[idx], self.records[idx + 1]
-        self.refresh_tree(select_index=idx + 1)
+        self.list_model.move(idx, idx + 1)
+        self.refresh_selection(select_index=idx + 1)
 
     def clear_all(self):
-        self.records.clear()
-        self.refresh_tree()
+        self._cancel_thumb_jobs()
+        self._preview_cache.clear()
+        self._row_thumbs.clear()
+        self.list_model.clear()
+        self.refresh_selection()
 
     def convert_to_pdf(self):
-        if not self.records:
+        if not len(self.list_model):
             messagebox.showwarning("Atención", "Agrega imágenes primero.")
             return
 
@@ -495,31 +1338,75 @@ class ImagesToPdfTab(ctk.CTkFrame):
         if not out:
             return
 
+        unreadable = []  # índices de imágenes que no se pudieron leer
         try:
-            pil_images = []
-            for rec in self.records:
-                with Image.open(rec["path"]) as im:
-                    pil_images.append(normalize_image_for_pdf(im).copy())
-
-            first, rest = pil_images[0], pil_images[1:]
-            first.save(out, "PDF", save_all=True, append_images=rest)
-
-            for im in pil_images:
-                im.close()
-
-            messagebox.showinfo("Éxito", f"PDF creado:\n{out}")
+            # Una imagen a la vez: los JPEG aptos se copian sin decodificar;
+            # el resto se decodifica, normaliza, escribe y libera.
+            with ImagePdfWriter(out) as writer:
+                for idx, rec in enumerate(self.list_model.records):
+                    passthrough = page = None
+                    try:
+                        with Image.open(rec.path) as im:
+                            colorspace = jpeg_passthrough_colorspace(im)
+                            if colorspace:
+                                passthrough = (im.size[0], im.size[1], colorspace)
+                            else:
+                                page = normalize_image_for_pdf(im)
+                    except (OSError, ValueError, Image.DecompressionBombError):
+                        # Su miniatura puede no haber fallado aún: se omite aquí
+                        unreadable.append(idx)
+                        continue
+                    if passthrough:
+                        writer.add_jpeg_file(rec.path, *passthrough)
+                    else:
+                        writer.add_image(page)
+                        page.close()
+                if not writer.page_count:
+                    raise ValueError("Ninguna de las imágenes se pudo leer.")
         except Exception as e:
-            messagebox.showerror("Error", f"No se pudo crear PDF.\n\n{e}")
+            error = e
+        else:
+            error = None
+
+        skipped = self._drop_unreadable(unreadable)
+        if error is not None:
+            messagebox.showerror("Error", f"No se pudo crear PDF.\n\n{error}")
+        elif skipped:
+            messagebox.showwarning(
+                "PDF creado",
+                f"PDF creado:\n{out}\n\nSe omitieron {len(skipped)} imagen(es) ilegibles:\n"
+                + "\n".join(os.path.basename(p) for p in skipped[:10]))
+        else:
+            messagebox.showinfo("Éxito", f"PDF creado:\n{out}")
+
+    def _drop_unreadable(self, indices):
+        """Quita de la lista las filas indicadas y devuelve sus rutas."""
+        if not indices:
+            return []
+        sel = self.list_model.selected_index()
+        paths = []
+        for idx in reversed(indices):
+            self._row_thumbs.pop(self.list_model.iid_at(idx), None)
+            paths.append(self.list_model.pop(idx).path)
+            if sel is not None and sel > idx:
+                sel -= 1
+        self.refresh_selection(select_index=sel)
+        return paths[::-1]
 
 
 # -------------------- Tab 2: Fusionar PDFs por página -------------------- #
 class MergePdfTab(ctk.CTkFrame):
     PDF_EXTS = (".pdf",)
+    THUMB_SCALE = 0.30        # escala de render de las miniaturas de página
 
     def __init__(self, master):
         super().__init__(master)
-        self.records = []  # [{pdf_path,page_idx,label,thumb}]
+        self.list_model = None  # TreeListModel de PageRef(pdf, primera, última página)
+        self.thumbs = None      # VirtualThumbnails de list_model
         self._drag_from_index = None
+        self._preview_key = None  # (pdf, página) que muestra la vista previa
+
+        self._merge_cancel = None  # threading.Event mientras hay una fusión en curso
 
         self._build_ui()
         self._register_dnd_if_available()
@@ -533,10 +1420,12 @@ class MergePdfTab(ctk.CTkFrame):
         top.grid_columnconfigure(7, weight=1)
 
         ctk.CTkButton(top, text="Agregar PDF(s)", command=self.add_pdfs).grid(row=0, column=0, padx=6, pady=8)
-        ctk.CTkButton(top, text="Quitar página", command=self.remove_selected).grid(row=0, column=1, padx=6, pady=8)
+        ctk.CTkButton(top, text="Quitar", width=80, command=self.remove_selected).grid(row=0, column=1, padx=6, pady=8)
         ctk.CTkButton(top, text="Subir", width=70, command=self.move_up).grid(row=0, column=2, padx=6, pady=8)
         ctk.CTkButton(top, text="Bajar", width=70, command=self.move_down).grid(row=0, column=3, padx=6, pady=8)
         ctk.CTkButton(top, text="Limpiar", width=80, command=self.clear_all).grid(row=0, column=4, padx=6, pady=8)
+        ctk.CTkButton(top, text="Expandir páginas", command=self.expand_selected).grid(
+            row=0, column=5, padx=6, pady=8)
 
         self.dnd_hint = ctk.CTkLabel(top, text="Arrastra PDF(s) desde el explorador")
         self.dnd_hint.grid(row=0, column=7, padx=10, sticky="e")
@@ -545,7 +1434,8 @@ class MergePdfTab(ctk.CTkFrame):
         left.grid(row=1, column=0, sticky="nsw", padx=(12, 8), pady=(0, 12))
         left.grid_rowconfigure(1, weight=1)
 
-        ctk.CTkLabel(left, text="Orden final de páginas (miniaturas)", font=ctk.CTkFont(weight="bold")).grid(
+        ctk.CTkLabel(left, text="Orden final (doble clic en un documento para expandirlo)",
+                     font=ctk.CTkFont(weight="bold")).grid(
             row=0, column=0, sticky="w", padx=10, pady=(10, 6)
         )
 
@@ -559,11 +1449,14 @@ class MergePdfTab(ctk.CTkFrame):
 
         scroll = ttk.Scrollbar(container, orient="vertical", command=self.tree.yview)
         scroll.grid(row=0, column=1, sticky="ns")
-        self.tree.configure(yscrollcommand=scroll.set)
+        self.list_model = TreeListModel(self.tree, scroll, self._record_label,
+                                        on_visible_change=lambda: self.thumbs.update())
+        self.thumbs = VirtualThumbnails(self.list_model, self.THUMB_SCALE, "merge-thumb")
 
         self.tree.bind("<<TreeviewSelect>>", self.on_select)
         self.tree.bind("<ButtonPress-1>", self.on_drag_start)
         self.tree.bind("<B1-Motion>", self.on_drag_motion)
+        self.tree.bind("<Double-1>", self.expand_selected)
 
         right = ctk.CTkFrame(self, fg_color="#121722")
         right.grid(row=1, column=1, sticky="nsew", padx=(8, 12), pady=(0, 12))
@@ -584,9 +1477,21 @@ class MergePdfTab(ctk.CTkFrame):
         self.count_label = ctk.CTkLabel(bottom, text="0 páginas")
         self.count_label.grid(row=0, column=0, padx=10, pady=10, sticky="w")
 
-        ctk.CTkButton(bottom, text="Fusionar PDF", height=40, command=self.merge_pdf).grid(
-            row=0, column=2, padx=10, pady=10, sticky="e"
-        )
+        self.merge_progress = ctk.CTkProgressBar(bottom)
+        self.merge_progress.set(0)
+        self.merge_progress.grid(row=0, column=1, padx=10, pady=10, sticky="ew")
+
+        ctk.CTkLabel(bottom, text="Motor:").grid(row=0, column=2, padx=(10, 2), pady=10, sticky="e")
+        self.engine_var = tk.StringVar(value="PyMuPDF")
+        ctk.CTkOptionMenu(bottom, variable=self.engine_var, width=110,
+                          values=list(MERGE_ENGINES)).grid(row=0, column=3, padx=4, pady=10, sticky="e")
+
+        self.cancel_btn = ctk.CTkButton(bottom, text="Cancelar", width=90, height=40,
+                                        state="disabled", command=self.cancel_merge)
+        self.cancel_btn.grid(row=0, column=4, padx=(10, 0), pady=10, sticky="e")
+
+        self.merge_btn = ctk.CTkButton(bottom, text="Fusionar PDF", height=40, command=self.merge_pdf)
+        self.merge_btn.grid(row=0, column=5, padx=10, pady=10, sticky="e")
 
     def _register_dnd_if_available(self):
         if not DND_AVAILABLE:
@@ -614,57 +1519,68 @@ class MergePdfTab(ctk.CTkFrame):
             self.add_pdf_paths(list(paths))
 
     def add_pdf_paths(self, paths):
+        recs = []
         for pdf_path in paths:
             try:
-                doc = fitz.open(pdf_path)
-                base = os.path.basename(pdf_path)
-
-                for page_idx in range(doc.page_count):
-                    page = doc.load_page(page_idx)
-
-                    pix = page.get_pixmap(matrix=fitz.Matrix(0.30, 0.30), alpha=False)
-                    im = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                    thumb_pil = make_square_thumbnail(im, size=(76, 76), bg="#1d2433")
-                    thumb_tk = ImageTk.PhotoImage(thumb_pil)
-
-                    label = f"{base} | pág. {page_idx + 1}"
-                    self.records.append({
-                        "pdf_path": pdf_path,
-                        "page_idx": page_idx,
-                        "label": label,
-                        "thumb": thumb_tk
-                    })
-
-                doc.close()
+                # Solo se cuentan páginas; las miniaturas se generan al hacerse visibles
+                with get_doc_pool().document(pdf_path) as doc:
+                    page_count = doc.page_count
+                if page_count:
+                    # Un solo registro por documento; se expande bajo demanda
+                    recs.append(PageRef(pdf_path, 0, page_count - 1))
             except Exception as e:
                 messagebox.showwarning("Advertencia", f"No se pudo abrir:\n{pdf_path}\n\n{e}")
 
-        self.refresh_tree(select_index=max(0, len(self.records) - 1))
+        self.list_model.extend(recs, image=lambda _rec: self.thumbs.placeholder)
+        self.refresh_selection(select_index=max(0, len(self.list_model) - 1))
 
-    def refresh_tree(self, select_index=None):
-        self.tree.delete(*self.tree.get_children())
-        for i, rec in enumerate(self.records):
-            txt = f"{i + 1:03d}. {rec['label']}"
-            self.tree.insert("", "end", iid=str(i), text=txt, image=rec["thumb"])
+    @staticmethod
+    def _record_label(rec):
+        base = os.path.basename(rec.path)
+        if rec.first == rec.last:
+            return f"{base} | pág. {rec.first + 1}"
+        return f"{base} | págs. {rec.first + 1}–{rec.last + 1}"
+
+    def expand_selected(self, _=None):
+        """Sustituye un registro agrupado por una fila por página."""
+        idx = self.get_selected_index()
+        if idx is None:
+            return
+        rec = self.list_model.records[idx]
+        if rec.first == rec.last:
+            return
+        pages = [PageRef(rec.path, i, i) for i in range(rec.first, rec.last + 1)]
+        iid = self.list_model.iid_at(idx)
+        self.list_model.pop(idx)
+        self.thumbs.forget(iid)
+        self.list_model.insert(idx, pages, image=lambda _rec: self.thumbs.placeholder)
+        self.refresh_selection(select_index=idx)
+        return "break"
+
+    def destroy(self):
+        self.thumbs.shutdown()
+        if self._merge_cancel is not None:
+            self._merge_cancel.set()
+        super().destroy()
 
-        self.count_label.configure(text=f"{len(self.records)} páginas")
+    def refresh_selection(self, select_index=None):
+        n = len(self.list_model)
+        self.count_label.configure(text=f"{self._page_total()} páginas")
 
-        if self.records:
+        if n:
             if select_index is None:
                 select_index = 0
-            select_index = max(0, min(select_index, len(self.records) - 1))
-            self.tree.selection_set(str(select_index))
-            self.tree.focus(str(select_index))
-            self.tree.see(str(select_index))
+            select_index = max(0, min(select_index, n - 1))
+            self.list_model.select(select_index)
             self.show_preview(select_index)
         else:
             self.clear_preview()
 
+    def _page_total(self):
+        return self.list_model.page_count
+
     def get_selected_index(self):
-        sel = self.tree.selection()
-        if not sel:
-            return None
-        return int(sel[0])
+        return self.list_model.selected_index()
 
     def on_select(self, _=None):
         idx = self.get_selected_index()
@@ -672,28 +1588,26 @@ class MergePdfTab(ctk.CTkFrame):
             self.show_preview(idx)
 
     def show_preview(self, idx):
-        if not (0 <= idx < len(self.records)):
+        if not (0 <= idx < len(self.list_model)):
             self.clear_preview()
             return
 
-        rec = self.records[idx]
-        try:
-            doc = fitz.open(rec["pdf_path"])
-            page = doc.load_page(rec["page_idx"])
-            pix = page.get_pixmap(matrix=fitz.Matrix(2.0, 2.0), alpha=False)
-            doc.close()
-
-            im = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-            self.preview_widget.set_image(im)
-        except Exception:
-            self.preview_widget.clear()
+        rec = self.list_model.records[idx]
+        # Arrastrar o subir/bajar no cambia la página mostrada: no rehacer la vista previa
+        if (rec.path, rec.first) == self._preview_key:
+            return
+        self._preview_key = (rec.path, rec.first)
+        measure, render = pdf_page_renderer(rec.path, rec.first)
+        self.preview_widget.set_renderer(
+            measure, render, preview=cached_thumbnail_preview(rec.path, rec.first, self.THUMB_SCALE))
 
     def clear_preview(self):
+        self._preview_key = None
         self.preview_widget.clear()
 
     def on_drag_start(self, event):
         row = self.tree.identify_row(event.y)
-        self._drag_from_index = int(row) if row else None
+        self._drag_from_index = self.list_model.index_of(row) if row else None
 
     def on_drag_motion(self, event):
         if self._drag_from_index is None:
@@ -702,43 +1616,47 @@ class MergePdfTab(ctk.CTkFrame):
         if not row:
             return
 
-        to_index = int(row)
+        to_index = self.list_model.index_of(row)
         frm = self._drag_from_index
         if to_index == frm:
             return
 
-        item = self.records.pop(frm)
-        self.records.insert(to_index, item)
+        self.list_model.move(frm, to_index)
         self._drag_from_index = to_index
-        self.refresh_tree(select_index=to_index)
+        self.refresh_selection(select_index=to_index)
 
     def remove_selected(self):
         idx = self.get_selected_index()
         if idx is None:
             return
-        self.records.pop(idx)
-        self.refresh_tree(select_index=max(0, idx - 1))
+        iid = self.list_model.iid_at(idx)
+        self.list_model.pop(idx)
+        self.thumbs.forget(iid)
+        self.refresh_selection(select_index=max(0, idx - 1))
 
     def move_up(self):
         idx = self.get_selected_index()
         if idx is None or idx == 0:
             return
-        self.records[idx - 1], self.records[idx] = self.records[idx], self.records[idx - 1]
-        self.refresh_tree(select_index=idx - 1)
+        self.list_model.move(idx, idx - 1)
+        self.refresh_selection(select_index=idx - 1)
 
     def move_down(self):
         idx = self.get_selected_index()
-        if idx is None or idx >= len(self.records) - 1:
+        if idx is None or idx >= len(self.list_model) - 1:
             return
-        self.records[idx + 1], self.records[idx] = self.records[idx], self.records[idx + 1]
-        self.refresh_tree(select_index=idx + 1)
+        self.list_model.move(idx, idx + 1)
+        self.refresh_selection(select_index=idx + 1)
 
     def clear_all(self):
-        self.records.clear()
-        self.refresh_tree()
+        self.thumbs.reset()
+        self.list_model.clear()
+        self.refresh_selection()
 
     def merge_pdf(self):
-        if not self.records:
+        if self._merge_cancel is not None:
+            return
+        if not len(self.list_model):
             messagebox.showwarning("Atención", "Agrega PDF(s) primero.")
             return
 
@@ -750,22 +1668,67 @@ class MergePdfTab(ctk.CTkFrame):
         if not out:
             return
 
-        try:
-            writer = PdfWriter()
-            cache = {}
+        engine = self.engine_var.get()
+        ranges = coalesce_ranges(self.list_model.records)
+        total = sum(to - frm + 1 for _, frm, to in ranges)
+        cancel = threading.Event()
+        self._merge_cancel = cancel
+        self.merge_btn.configure(state="disabled")
+        self.cancel_btn.configure(state="normal")
+        self.merge_progress.set(0)
+        self.count_label.configure(text=f"Fusionando 0/{total}...")
+
+        last_report = [0.0]
+
+        def progress(done):
+            # Limita las actualizaciones de la UI a ~10 por segundo
+            now = time.perf_counter()
+            if now - last_report[0] >= 0.1 or done == total:
+                last_report[0] = now
+                self.after(0, lambda d=done: self._on_merge_progress(d, total))
+
+        def do_merge():
+            t0 = time.perf_counter()
+            try:
+                count = run_merge(MERGE_ENGINES[engine], ranges, out, progress=progress, cancel=cancel)
+                elapsed = max(time.perf_counter() - t0, 1e-6)
+                self.after(0, lambda: self._on_merge_done(out, engine, count, elapsed, None))
+            except MergeCancelled:
+                self.after(0, lambda: self._on_merge_done(out, engine, 0, 0, None, cancelled=True))
+            except Exception as e:
+                self.after(0, lambda err=e: self._on_merge_done(out, engine, 0, 0, err))
 
-            for rec in self.records:
-                path, idx = rec["pdf_path"], rec["page_idx"]
-                if path not in cache:
-                    cache[path] = PdfReader(path)
-                writer.add_page(cache[path].pages[idx])
+        threading.Thread(target=do_merge, daemon=True).start()
 
-            with open(out, "wb") as f:
-                writer.write(f)
+    def cancel_merge(self):
+        if self._merge_cancel is not None:
+            self._merge_cancel.set()
+            self.cancel_btn.configure(state="disabled")
+            self.count_label.configure(text="Cancelando...")
 
-            messagebox.showinfo("Éxito", f"PDF fusionado:\n{out}")
-        except Exception as e:
-            messagebox.showerror("Error", f"No se pudo fusionar el PDF.\n\n{e}")
+    def _on_merge_progress(self, done, total):
+        if self._merge_cancel is None or self._merge_cancel.is_set():
+            return
+        self.merge_progress.set(done / total if total else 1)
+        self.count_label.configure(text=f"Fusionando {done}/{total}...")
+
+    def _on_merge_done(self, out, engine, count, elapsed, error, cancelled=False):
+        self._merge_cancel = None
+        self.merge_btn.configure(state="normal")
+        self.cancel_btn.configure(state="disabled")
+        self.merge_progress.set(0)
+        self.count_label.configure(text=f"{self._page_total()} páginas")
+
+        if cancelled:
+            messagebox.showinfo("Cancelado", "Fusión cancelada. No se escribió ningún archivo.")
+        elif error is not None:
+            messagebox.showerror("Error", f"No se pudo fusionar el PDF.\n\n{error}")
+        else:
+            messagebox.showinfo(
+                "Éxito",
+                f"PDF fusionado:\n{out}\n\n"
+                f"{count} páginas en {elapsed:.2f} s "
+                f"({count / elapsed:.0f} págs/s, motor {engine})")
 
 
 
@@ -775,12 +1738,21 @@ from editor_tab import EditPdfTab  # noqa: E402
 
 # -------------------- Tab 4: PDF -> JPG/PNG -------------------- #
 class PdfToImageTab(ctk.CTkFrame):
+    CPU_COUNT = os.cpu_count() or 1
+    FORMAT_EXTS = {"JPG": ".jpg", "PNG": ".png", "TIFF": ".tif"}
+    COLOR_MODES = {"RGB": "RGB", "Gris": "GRAY", "1 bit": "1"}
+    TARGETS = {"Carpeta": None, "TIFF multipágina": "TIFF", "ZIP": "ZIP"}
+    THUMB_SCALE = 0.25        # escala de render de las miniaturas de página
+
     def __init__(self, master):
         super().__init__(master)
-        self.doc = None
         self.pdf_path = None
+        self.page_count = 0
         self.current_page = 0
-        self.page_thumbs = []
+        self.list_model = None  # TreeListModel con una PageRef por página
+        self.thumbs = None      # VirtualThumbnails de list_model
+
+        self._export_cancel = None  # threading.Event mientras hay una exportación en curso
 
         self._build_ui()
         self._register_dnd_if_available()
@@ -811,7 +1783,7 @@ class PdfToImageTab(ctk.CTkFrame):
         ctk.CTkLabel(top, text="Formato:", font=small).grid(row=0, column=4, padx=(10, 2), pady=8)
         self.format_var = tk.StringVar(value="JPG")
         ctk.CTkOptionMenu(top, variable=self.format_var, width=80,
-                           values=["JPG", "PNG"]).grid(row=0, column=5, padx=4, pady=8)
+                           values=list(self.FORMAT_EXTS)).grid(row=0, column=5, padx=4, pady=8)
 
         ctk.CTkLabel(top, text="Calidad JPG:", font=small).grid(
             row=0, column=6, padx=(10, 2), pady=8)
@@ -820,8 +1792,20 @@ class PdfToImageTab(ctk.CTkFrame):
                            values=["70", "80", "90", "95", "100"]).grid(
             row=0, column=7, padx=4, pady=8)
 
+        ctk.CTkLabel(top, text="Color:", font=small).grid(row=0, column=8, padx=(10, 2), pady=8)
+        self.color_var = tk.StringVar(value="RGB")
+        ctk.CTkOptionMenu(top, variable=self.color_var, width=80,
+                          values=list(self.COLOR_MODES)).grid(row=0, column=9, padx=4, pady=8)
+
+        ctk.CTkLabel(top, text="Umbral 1 bit:", font=small).grid(
+            row=0, column=10, padx=(10, 2), pady=8)
+        self.threshold_var = tk.StringVar(value="128")
+        ctk.CTkOptionMenu(top, variable=self.threshold_var, width=70,
+                          values=["64", "96", "128", "160", "192"]).grid(
+            row=0, column=11, padx=4, pady=8)
+
         self.dnd_hint = ctk.CTkLabel(top, text="Arrastra un PDF")
-        self.dnd_hint.grid(row=0, column=8, padx=10, sticky="e")
+        self.dnd_hint.grid(row=0, column=12, padx=10, sticky="e")
 
         # ---- Panel izquierdo: miniaturas ----
         left = ctk.CTkFrame(self, fg_color="#121722", width=200)
@@ -843,7 +1827,10 @@ class PdfToImageTab(ctk.CTkFrame):
 
         scroll = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
         scroll.grid(row=0, column=1, sticky="ns")
-        self.tree.configure(yscrollcommand=scroll.set)
+        self.list_model = TreeListModel(self.tree, scroll, lambda rec: f"  Página {rec.first + 1}",
+                                        on_visible_change=lambda: self.thumbs.update(),
+                                        numbered=False)
+        self.thumbs = VirtualThumbnails(self.list_model, self.THUMB_SCALE, "export-thumb")
         self.tree.bind("<<TreeviewSelect>>", self._on_page_select)
 
         # ---- Panel central: vista previa con zoom ----
@@ -898,6 +1885,35 @@ class PdfToImageTab(ctk.CTkFrame):
         ctk.CTkFrame(right, height=2, fg_color="#2a3040").pack(
             fill="x", padx=12, pady=10)
 
+        target_frame = ctk.CTkFrame(right, fg_color="transparent")
+        target_frame.pack(fill="x", padx=12, pady=(0, 6))
+        ctk.CTkLabel(target_frame, text="Destino:", font=small).pack(side="left")
+        self.target_var = tk.StringVar(value="Carpeta")
+        ctk.CTkOptionMenu(target_frame, variable=self.target_var, width=130,
+                          values=list(self.TARGETS)).pack(side="left", padx=4)
+
+        self.incremental_var = tk.BooleanVar(value=True)
+        ctk.CTkCheckBox(right, text="Solo páginas modificadas", font=small,
+                        variable=self.incremental_var).pack(anchor="w", padx=12, pady=(0, 6))
+
+        workers_frame = ctk.CTkFrame(right, fg_color="transparent")
+        workers_frame.pack(fill="x", padx=12, pady=4)
+        ctk.CTkLabel(workers_frame, text="Procesos:", font=small).pack(side="left")
+        worker_values = [str(n) for n in (1, 2, 4, 8, 16) if n <= self.CPU_COUNT]
+        self.workers_var = tk.StringVar(value=str(max(n for n in (1, 2, 4, 8) if n <= self.CPU_COUNT)))
+        ctk.CTkOptionMenu(workers_frame, variable=self.workers_var, width=70,
+                          values=worker_values).pack(side="left", padx=4)
+
+        encoders_frame = ctk.CTkFrame(right, fg_color="transparent")
+        encoders_frame.pack(fill="x", padx=12, pady=4)
+        ctk.CTkLabel(encoders_frame, text="Codificadores:", font=small).pack(side="left")
+        self.encoders_var = tk.StringVar(value=str(max(1, min(4, self.CPU_COUNT))))
+        ctk.CTkOptionMenu(encoders_frame, variable=self.encoders_var, width=60,
+                          values=["1", "2", "3", "4", "6", "8"]).pack(side="left", padx=4)
+        ctk.CTkLabel(right, text="Con 1 proceso: hilos que comprimen\nmientras se renderiza la siguiente página.",
+                     font=ctk.CTkFont(size=11), text_color="#666f80", justify="left").pack(
+            anchor="w", padx=12, pady=(0, 4))
+
         self.info_label = ctk.CTkLabel(right, text="", font=small, text_color="#93a1ba",
                                         wraplength=190, justify="left")
         self.info_label.pack(anchor="w", padx=12, pady=4)
@@ -910,6 +1926,17 @@ class PdfToImageTab(ctk.CTkFrame):
         self.page_label = ctk.CTkLabel(bottom, text="Sin documento", font=small)
         self.page_label.grid(row=0, column=0, padx=10, pady=10, sticky="w")
 
+        self.export_progress = ctk.CTkProgressBar(bottom)
+        self.export_progress.set(0)
+        self.export_progress.grid(row=0, column=1, padx=10, pady=10, sticky="ew")
+
+        self.export_status = ctk.CTkLabel(bottom, text="", font=small)
+        self.export_status.grid(row=0, column=2, padx=6, pady=10, sticky="e")
+
+        self.cancel_btn = ctk.CTkButton(bottom, text="Cancelar", width=90, state="disabled",
+                                        command=self.cancel_export)
+        self.cancel_btn.grid(row=0, column=3, padx=10, pady=10, sticky="e")
+
     def _register_dnd_if_available(self):
         if not DND_AVAILABLE:
             return
@@ -935,64 +1962,62 @@ class PdfToImageTab(ctk.CTkFrame):
         if path:
             self._load_pdf(path)
 
-    def _load_pdf(self, path):
-        if self.doc:
-            self.doc.close()
+    def _document(self):
+        """Documento actual desde el pool compartido (usar con `with`)."""
+        return get_doc_pool().document(self.pdf_path)
 
+    def _load_pdf(self, path):
         try:
-            self.doc = fitz.open(path)
+            with get_doc_pool().document(path) as doc:
+                page_count = doc.page_count
             self.pdf_path = path
+            self.page_count = page_count
             self.current_page = 0
-            self.range_to_var.set(str(self.doc.page_count))
+            self.range_to_var.set(str(self.page_count))
             self._build_thumbnails()
             self._show_preview(0)
             self.info_label.configure(
                 text=f"Archivo: {os.path.basename(path)}\n"
-                     f"Páginas: {self.doc.page_count}"
+                     f"Páginas: {self.page_count}"
             )
         except Exception as e:
             messagebox.showerror("Error", f"No se pudo abrir el PDF.\n\n{e}")
 
     def _build_thumbnails(self):
-        self.page_thumbs.clear()
-        self.tree.delete(*self.tree.get_children())
+        """Crea las filas con un placeholder; las miniaturas se renderizan al hacerse visibles."""
+        self.thumbs.reset()
+        self.list_model.clear()
 
-        if not self.doc:
+        if not self.pdf_path:
             return
 
-        for i in range(self.doc.page_count):
-            page = self.doc[i]
-            pix = page.get_pixmap(matrix=fitz.Matrix(0.25, 0.25), alpha=False)
-            im = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-            thumb = make_square_thumbnail(im, size=(76, 76), bg="#1d2433")
-            thumb_tk = ImageTk.PhotoImage(thumb)
-            self.page_thumbs.append(thumb_tk)
-            self.tree.insert("", "end", iid=str(i), text=f"  Página {i + 1}", image=thumb_tk)
-
-        if self.doc.page_count > 0:
-            self.tree.selection_set("0")
-            self.tree.focus("0")
+        self.list_model.extend((PageRef(self.pdf_path, i, i) for i in range(self.page_count)),
+                               image=lambda _rec: self.thumbs.placeholder)
+        if self.page_count > 0:
+            self.list_model.select(0)
 
     def _on_page_select(self, _=None):
-        sel = self.tree.selection()
-        if not sel:
+        idx = self.list_model.selected_index()
+        if idx is None:
             return
-        idx = int(sel[0])
         self.current_page = idx
         self._show_preview(idx)
 
     def _show_preview(self, idx):
-        if not self.doc or idx >= self.doc.page_count:
+        if not self.pdf_path or idx >= self.page_count:
             return
 
-        page = self.doc[idx]
-        pix = page.get_pixmap(matrix=fitz.Matrix(2.0, 2.0), alpha=False)
-        im = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+        measure, render = pdf_page_renderer(self.pdf_path, idx)
+        self.page_label.configure(text=f"Página {idx + 1} de {self.page_count}")
+        self.preview_widget.set_renderer(
+            measure, render, preview=cached_thumbnail_preview(self.pdf_path, idx, self.THUMB_SCALE),
+            on_size=lambda size: self._show_page_size(idx, size))
 
-        self.preview_widget.set_image(im)
+    def _show_page_size(self, idx, size):
+        pw, ph = size
         self.page_label.configure(
-            text=f"Página {idx + 1} de {self.doc.page_count}  |  "
-                 f"{page.rect.width:.0f} x {page.rect.height:.0f} pt")
+            text=f"Página {idx + 1} de {self.page_count}  |  "
+                 f"{pw:.0f} x {ph:.0f} pt")
 
     # ---- Helpers de exportación ----
     def _get_dpi(self):
@@ -1010,31 +2035,155 @@ class PdfToImageTab(ctk.CTkFrame):
     def _get_format(self):
         return self.format_var.get().upper()
 
+    def _get_ext(self):
+        return self.FORMAT_EXTS.get(self._get_format(), ".png")
+
+    def _get_threshold(self):
+        try:
+            return max(1, min(255, int(self.threshold_var.get())))
+        except ValueError:
+            return 128
+
+    def _get_container(self):
+        return self.TARGETS.get(self.target_var.get())
+
+    def _get_workers(self):
+        try:
+            return max(1, min(self.CPU_COUNT, int(self.workers_var.get())))
+        except ValueError:
+            return 1
+
+    def _get_encoders(self):
+        try:
+            return max(1, int(self.encoders_var.get()))
+        except ValueError:
+            return 2
+
+    def _export_options(self):
+        return ExportOptions(dpi=self._get_dpi(), fmt=self._get_format(),
+                             quality=self._get_quality(),
+                             colorspace=self.COLOR_MODES.get(self.color_var.get(), "RGB"),
+                             threshold=self._get_threshold())
+
+    def _options_ok(self):
+        try:
+            check_options(self._export_options())
+            return True
+        except ValueError as e:
+            messagebox.showwarning("Atención", str(e))
+            return False
+
     def _export_page(self, page_idx, output_path):
-        page = self.doc[page_idx]
-        dpi = self._get_dpi()
-        scale = dpi / 72.0
-        mat = fitz.Matrix(scale, scale)
-        pix = page.get_pixmap(matrix=mat, alpha=False)
-        im = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+        with self._document() as doc:
+            export_page(doc, page_idx, output_path, self._export_options())
+
+    def _start_export(self, jobs, out_folder, summary, container=None):
+        """Exporta jobs = [(página, ruta o nombre en container)] en segundo plano."""
+        cancel = threading.Event()
+        self._export_cancel = cancel
+        self.cancel_btn.configure(state="normal")
+        self.export_progress.set(0)
+        self.export_status.configure(text="Preparando exportación...")
+
+        pdf_path, opts = self.pdf_path, self._export_options()
+        workers, encoders = self._get_workers(), self._get_encoders()
+        incremental = self.incremental_var.get() and container is None
+        stats = ExportStats()
+
+        last_report = [0.0]
+        total = [len(jobs)]
+
+        def progress(done):
+            # Limita las actualizaciones de la UI a ~10 por segundo
+            now = time.perf_counter()
+            if now - last_report[0] >= 0.1 or done == total[0]:
+                last_report[0] = now
+                self.after(0, lambda d=done, t=total[0], st=stats.summary():
+                           self._on_export_progress(d, t, st))
+
+        def do_export():
+            try:
+                todo = jobs
+                if container is not None:
+                    count = export_container(pdf_path, jobs, opts, out_folder, container,
+                                             workers=workers, encoders=encoders,
+                                             progress=progress,
+                                             cancel=cancel, stats=stats)
+                else:
+                    if incremental:
+                        manifest = ExportManifest.load(out_folder)
+                        todo = manifest.plan(pdf_path, jobs, opts, cancel=cancel)
+                        total[0] = len(todo)
+                    try:
+                        count = export_pages(pdf_path, todo, opts, workers=workers, encoders=encoders,
+                                             progress=progress, cancel=cancel, stats=stats)
+                    finally:
+                        if incremental:
+                            manifest.commit(todo[:stats.done])
+                            manifest.save()
+                unchanged = len(jobs) - len(todo)
+                note = f"\n{unchanged} páginas sin cambios (se conservaron)" if unchanged else ""
+                self.after(0, lambda st=stats.summary(): self._on_export_done(
+                    f"{count} páginas exportadas{summary} en:\n{out_folder}{note}\n\n"
+                    f"Páginas/s por etapa: {st}", None))
+            except ExportCancelled:
+                self.after(0, lambda: self._on_export_done(None, None, cancelled=True))
+            except Exception as e:
+                self.after(0, lambda err=e: self._on_export_done(None, err))
 
-        fmt = self._get_format()
-        if fmt == "JPG":
-            im.save(output_path, "JPEG", quality=self._get_quality())
+        threading.Thread(target=do_export, daemon=True).start()
+
+    def cancel_export(self):
+        if self._export_cancel is not None:
+            self._export_cancel.set()
+            self.cancel_btn.configure(state="disabled")
+            self.export_status.configure(text="Cancelando...")
+
+    def _export_busy(self):
+        if self._export_cancel is not None:
+            messagebox.showinfo("Exportación", "Ya hay una exportación en curso.")
+            return True
+        return False
+
+    def _on_export_progress(self, done, total, stage_rates):
+        if self._export_cancel is None or self._export_cancel.is_set():
+            return
+        self.export_progress.set(done / total if total else 1)
+        self.export_status.configure(text=f"Exportando {done}/{total}  |  {stage_rates}")
+
+    def _on_export_done(self, message, error, cancelled=False):
+        self._export_cancel = None
+        self.cancel_btn.configure(state="disabled")
+        self.export_progress.set(0)
+        self.export_status.configure(text="")
+
+        if cancelled:
+            messagebox.showinfo("Cancelado", "Exportación cancelada. Las páginas ya escritas se conservan.")
+        elif error is not None:
+            messagebox.showerror("Error", f"Error al exportar.\n\n{error}")
         else:
-            im.save(output_path, "PNG")
+            messagebox.showinfo("Éxito", message)
+
+    def destroy(self):
+        self.thumbs.shutdown()
+        if self._export_cancel is not None:
+            self._export_cancel.set()
+        super().destroy()
 
     def _pdf_base_name(self):
         return os.path.splitext(os.path.basename(self.pdf_path))[0] if self.pdf_path else "pdf"
 
     # ---- Exportar página actual ----
     def export_current_page(self):
-        if not self.doc:
+        if not self.pdf_path:
             messagebox.showwarning("Atención", "Abre un PDF primero.")
             return
 
+        if not self._options_ok():
+            return
+
         fmt = self._get_format()
-        ext = ".jpg" if fmt == "JPG" else ".png"
+        ext = self._get_ext()
         base = self._pdf_base_name()
         default_name = f"{base}_pag_{self.current_page + 1}{ext}"
 
@@ -1053,43 +2202,57 @@ class PdfToImageTab(ctk.CTkFrame):
         except Exception as e:
             messagebox.showerror("Error", f"No se pudo exportar.\n\n{e}")
 
+    def _export_to_container(self, pages, summary, name):
+        """Exporta pages a un único TIFF multipágina o ZIP elegido por el usuario."""
+        container = self._get_container()
+        ext = CONTAINERS[container]
+        path = filedialog.asksaveasfilename(
+            title="Guardar exportación como",
+            initialfile=f"{name}{ext}",
+            defaultextension=ext,
+            filetypes=[(self.target_var.get(), f"*{ext}")]
+        )
+        if not path:
+            return
+        base, page_ext = self._pdf_base_name(), self._get_ext()
+        jobs = [(i, f"{base}_pag_{i + 1}{page_ext}") for i in pages]
+        self._start_export(jobs, path, summary, container=container)
+
     # ---- Exportar todas las páginas ----
     def export_all_pages(self):
-        if not self.doc:
+        if not self.pdf_path:
             messagebox.showwarning("Atención", "Abre un PDF primero.")
             return
+        if self._export_busy() or not self._options_ok():
+            return
+        if self._get_container():
+            self._export_to_container(range(self.page_count), "", self._pdf_base_name())
+            return
 
         folder = filedialog.askdirectory(title="Seleccionar carpeta de destino")
         if not folder:
             return
 
-        fmt = self._get_format()
-        ext = ".jpg" if fmt == "JPG" else ".png"
+        ext = self._get_ext()
         base = self._pdf_base_name()
         out_folder = os.path.join(folder, base)
         os.makedirs(out_folder, exist_ok=True)
 
-        try:
-            for i in range(self.doc.page_count):
-                out_path = os.path.join(out_folder, f"{base}_pag_{i + 1}{ext}")
-                self._export_page(i, out_path)
-
-            messagebox.showinfo(
-                "Éxito",
-                f"{self.doc.page_count} páginas exportadas en:\n{out_folder}"
-            )
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al exportar.\n\n{e}")
+        jobs = [(i, os.path.join(out_folder, f"{base}_pag_{i + 1}{ext}"))
+                for i in range(self.page_count)]
+        self._start_export(jobs, out_folder, "")
 
     # ---- Exportar rango ----
     def export_range(self):
-        if not self.doc:
+        if not self.pdf_path:
             messagebox.showwarning("Atención", "Abre un PDF primero.")
             return
+        if self._export_busy() or not self._options_ok():
+            return
 
         try:
             from_page = max(1, int(self.range_from_var.get()))
-            to_page = min(self.doc.page_count, int(self.range_to_var.get()))
+            to_page = min(self.page_count, int(self.range_to_var.get()))
         except ValueError:
             messagebox.showwarning("Atención", "Ingresa números válidos para el rango.")
             return
@@ -1098,12 +2261,16 @@ class PdfToImageTab(ctk.CTkFrame):
             messagebox.showwarning("Atención", "El rango 'Desde' debe ser menor o igual a 'Hasta'.")
             return
 
+        if self._get_container():
+            self._export_to_container(range(from_page - 1, to_page), f" ({from_page}-{to_page})",
+                                      f"{self._pdf_base_name()}_{from_page}-{to_page}")
+            return
+
         folder = filedialog.askdirectory(title="Seleccionar carpeta de destino")
         if not folder:
             return
 
-        fmt = self._get_format()
-        ext = ".jpg" if fmt == "JPG" else ".png"
+        ext = self._get_ext()
         base = self._pdf_base_name()
         total = to_page - from_page + 1
 
@@ -1113,19 +2280,9 @@ class PdfToImageTab(ctk.CTkFrame):
         else:
             out_folder = folder
 
-        try:
-            count = 0
-            for i in range(from_page - 1, to_page):
-                out_path = os.path.join(out_folder, f"{base}_pag_{i + 1}{ext}")
-                self._export_page(i, out_path)
-                count += 1
-
-            messagebox.showinfo(
-                "Éxito",
-                f"{count} páginas exportadas ({from_page}-{to_page}) en:\n{out_folder}"
-            )
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al exportar.\n\n{e}")
+        jobs = [(i, os.path.join(out_folder, f"{base}_pag_{i + 1}{ext}"))
+                for i in range(from_page - 1, to_page)]
+        self._start_export(jobs, out_folder, f" ({from_page}-{to_page})")
 
 
 # -------------------- App Base (con/sin DnD) -------------------- #
@@ -1270,13 +2427,15 @@ class OcrImageTab(ctk.CTkFrame):
             return
         self.status_lbl.configure(text="Procesando OCR...")
         self.update_idletasks()
-        img_np = np.array(self._current_image)
+        im = self._current_image
 
         def do_ocr():
             try:
+                import numpy as np
                 if self._ocr_reader is None:
+                    from rapidocr_onnxruntime import RapidOCR
                     self._ocr_reader = RapidOCR()
-                results, _ = self._ocr_reader(img_np)
+                results, _ = self._ocr_reader(np.array(im))
                 if results:
                     text = "\n".join(r[1] for r in results)
                     count = len(results)
@@ -1475,5 +2634,6 @@ class PDFStudioApp(BaseApp):
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # procesos de exportación en el ejecutable empaquetado
     app = PDFStudioApp()
     app.mainloop()
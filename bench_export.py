@@ -0,0 +1,104 @@
+# bench_export.py  –  Compara la codificación de páginas exportadas (tiempo y memoria pico)
+#
+# Uso:  python bench_export.py [archivo.pdf] [--page N] [--dpi 600] [--repeat 3]
+#
+# Cada variante corre en un proceso nuevo para medir su memoria pico por
+# separado (ru_maxrss; en Windows solo se informa el tiempo).
+import argparse
+import io
+import subprocess
+import sys
+import time
+
+from PIL import Image
+import fitz  # PyMuPDF
+
+from page_export import ExportOptions, encode_pixmap
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _peak_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _sample_page():
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 120), "PDF Studio Pro - benchmark", fontsize=28)
+    page.draw_circle((300, 420), 160, color=(1, 0, 0), fill=(0.2, 0.4, 0.9))
+    page.draw_rect(fitz.Rect(72, 620, 520, 760), color=(0, 0, 0), fill=(0.9, 0.8, 0.1))
+    return doc
+
+
+def _encode_copy(pix, opts):
+    # Ruta anterior: copia pix.samples a bytes y luego a una imagen PIL
+    im = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    buf = io.BytesIO()
+    if opts.fmt == "JPG":
+        im.save(buf, "JPEG", quality=opts.quality)
+    else:
+        im.save(buf, "PNG")
+    return buf.getvalue()
+
+
+def _encode_fitz_jpeg(pix, opts):
+    return pix.tobytes("jpeg", jpg_quality=opts.quality)
+
+
+def _encode_fitz_png(pix, opts):
+    # Ruta anterior para PNG: MuPDF comprime con el GIL tomado
+    return pix.tobytes("png")
+
+
+VARIANTS = {
+    "copia": _encode_copy,
+    "directo": encode_pixmap,
+    "mupdf-jpeg": _encode_fitz_jpeg,
+    "mupdf-png": _encode_fitz_png,
+}
+
+
+def run_one(variant, fmt, args):
+    doc = fitz.open(args.pdf) if args.pdf else _sample_page()
+    scale = args.dpi / 72.0
+    pix = doc[args.page].get_pixmap(matrix=fitz.Matrix(scale, scale), alpha=False)
+    opts = ExportOptions(dpi=args.dpi, fmt=fmt, quality=90)
+    base = _peak_mb()
+    t0 = time.perf_counter()
+    for _ in range(args.repeat):
+        data = VARIANTS[variant](pix, opts)
+    per_page = (time.perf_counter() - t0) / args.repeat
+    peak = _peak_mb()
+    extra = f"{peak - base:7.0f} MB" if peak is not None else "    n/d"
+    print(f"{fmt:4} {variant:11} {per_page:7.3f} s/pág  pico extra {extra}  "
+          f"{len(data) / 1024:8.0f} KB  ({pix.width}x{pix.height})")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark de codificación de páginas exportadas")
+    ap.add_argument("pdf", nargs="?")
+    ap.add_argument("--page", type=int, default=0)
+    ap.add_argument("--dpi", type=int, default=600)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--one", nargs=2, metavar=("VARIANTE", "FORMATO"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.one:
+        run_one(args.one[0], args.one[1], args)
+        return
+
+    passthrough = sys.argv[1:]
+    for fmt, variants in (("JPG", ("copia", "directo", "mupdf-jpeg")), ("PNG", ("copia", "directo", "mupdf-png"))):
+        for variant in variants:
+            subprocess.run([sys.executable, __file__, *passthrough, "--one", variant, fmt], check=True)
+
+
+if __name__ == "__main__":
+    main()
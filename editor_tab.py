@@ -1,20 +1,23 @@
 # editor_tab.py  –  Editor interactivo de PDF con edición inline y estilos por span
 import os
 import copy
+import importlib.util
 import threading
+from concurrent.futures import ThreadPoolExecutor
 import tkinter as tk
 import tkinter.font as tkfont
 from tkinter import filedialog, messagebox, ttk
 import customtkinter as ctk
-from PIL import Image, ImageOps, ImageTk, ImageDraw
+from PIL import Image, ImageOps, ImageTk
 import fitz  # PyMuPDF
 
-try:
-    from rapidocr_onnxruntime import RapidOCR
-    import numpy as np
-    OCR_AVAILABLE = True
-except ImportError:
-    OCR_AVAILABLE = False
+from render_cache import (FITZ_LOCK, THUMB_BOX_KEY, LruCache, get_thumb_cache, image_nbytes,
+                          thumbnail_content)
+from page_render import render_page
+
+# El OCR (onnxruntime) se importa al usarlo: los procesos hijos de exportación,
+# fusión y render reimportan el script principal y no deben cargarlo
+OCR_AVAILABLE = importlib.util.find_spec("rapidocr_onnxruntime") is not None
 
 try:
     from tkinterdnd2 import DND_FILES
@@ -46,7 +49,9 @@ def _fit(img, mw, mh):
 def _square_thumb(im, size=76, bg="#1d2433"):
     c = Image.new("RGB", (size, size), bg)
     t = _fit(im, size - 8, size - 8)
-    c.paste(t, ((size - t.size[0]) // 2, (size - t.size[1]) // 2))
+    x, y = (size - t.size[0]) // 2, (size - t.size[1]) // 2
+    c.paste(t, (x, y))
+    c.info[THUMB_BOX_KEY] = f"{x},{y},{x + t.size[0]},{y + t.size[1]}"
     return c
 
 
@@ -130,6 +135,7 @@ def _resolve_font_with_flags(font_base, flags):
 
 # ── class ────────────────────────────────────────────────────────────
 class EditPdfTab(ctk.CTkFrame):
+    THUMB_SCALE = 0.22  # escala de render de las miniaturas de página
 
     def __init__(self, master):
         super().__init__(master)
@@ -168,7 +174,28 @@ class EditPdfTab(ctk.CTkFrame):
         self._draw_start = None
         self._draw_rect_id = None
         self._render_pending = None
-        self._img_previews = []
+        # (ruta, ancho, alto) -> PhotoImage de imágenes agregadas, acotada en bytes
+        self._img_previews = LruCache(max_bytes=32 * 1024 * 1024,
+                                      sizeof=lambda photo: photo.width() * photo.height() * 4)
+        self._drawn_previews = []  # PhotoImages en el canvas: no pueden morir al expulsarse
+
+        # Raster de la página en dos pasadas: provisional al instante, nítido desde un proceso hijo
+        self._base_key = None      # (página, escala, versión del documento) de _base_raster
+        self._base_raster = None   # página sin retoques a esa escala (PIL)
+        self._base_pending = None  # clave que se está renderizando
+        self._base_gen = 0         # cambia con cada petición: invalida las anteriores
+        self._base_worker = None
+        self._doc_version = 0      # sube con cada cambio del documento (anotar, rotar, borrar...)
+        self._base_cache = LruCache(max_bytes=128 * 1024 * 1024, sizeof=image_nbytes)
+        self._page_pdfs = LruCache(max_items=4)  # (página, versión) -> PDF de esa página sola
+
+        # Rect y texto de cada página, leídos en un hilo: fitz no se toca desde Tk
+        self._page_info = LruCache(max_items=16)  # (página, versión) -> (rect, texto "dict")
+        self._info_pending = None  # clave que se está leyendo
+        self._info_gen = 0
+        self._info_worker = None
+        self._lines_key = None     # (página, versión) cuyas líneas faltan por extraer
+        self._bg_key = None        # clave del raster que muestra canvas_img_ref
 
         # resize state (for selected objects)
         self._resizing = False
@@ -437,10 +464,14 @@ class EditPdfTab(ctk.CTkFrame):
 
     def _load_pdf_file(self, path):
         self._commit_edit()
-        if self.doc:
-            self.doc.close()
         try:
-            self.doc = fitz.open(path)
+            with FITZ_LOCK:
+                if self.doc:
+                    self.doc.close()
+                self.doc = fitz.open(path)
+            self._doc_version += 1
+            self._base_cache.clear()
+            self._page_info.clear()
             self.pdf_path = path
             self.current_page = 0
             self.page_states.clear()
@@ -464,12 +495,14 @@ class EditPdfTab(ctk.CTkFrame):
         self._commit_edit()
         self._store_page_state()
         try:
-            self._apply_all_changes()
-            tmp = self.pdf_path + ".tmp"
-            self.doc.save(tmp, garbage=4, deflate=True)
-            self.doc.close()
-            os.replace(tmp, self.pdf_path)
-            self.doc = fitz.open(self.pdf_path)
+            with FITZ_LOCK:
+                self._apply_all_changes()
+                tmp = self.pdf_path + ".tmp"
+                self.doc.save(tmp, garbage=4, deflate=True)
+                self.doc.close()
+                os.replace(tmp, self.pdf_path)
+                self.doc = fitz.open(self.pdf_path)
+            self._doc_version += 1
             self.page_states.clear()
             self._build_thumbs()
             self._load_page(self.current_page)
@@ -487,10 +520,12 @@ class EditPdfTab(ctk.CTkFrame):
         self._commit_edit()
         self._store_page_state()
         try:
-            self._apply_all_changes()
-            self.doc.save(path, garbage=4, deflate=True)
-            self.doc.close()
-            self.doc = fitz.open(path)
+            with FITZ_LOCK:
+                self._apply_all_changes()
+                self.doc.save(path, garbage=4, deflate=True)
+                self.doc.close()
+                self.doc = fitz.open(path)
+            self._doc_version += 1
             self.pdf_path = path
             self.page_states.clear()
             self._build_thumbs()
@@ -505,11 +540,15 @@ class EditPdfTab(ctk.CTkFrame):
         self.tree.delete(*self.tree.get_children())
         if not self.doc:
             return
+        # La caché en disco solo vale mientras el documento coincide con el archivo
+        use_cache = bool(self.pdf_path) and not self.doc.is_dirty
         for i in range(self.doc.page_count):
-            pg = self.doc[i]
-            pix = pg.get_pixmap(matrix=fitz.Matrix(0.22, 0.22), alpha=False)
-            im = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-            tk_img = ImageTk.PhotoImage(_square_thumb(im))
+            if use_cache:
+                thumb = get_thumb_cache().get_or_create(
+                    self.pdf_path, i, 76, lambda i=i: self._render_thumb(i), scale=self.THUMB_SCALE)
+            else:
+                thumb = self._render_thumb(i)
+            tk_img = ImageTk.PhotoImage(thumb)
             self.page_thumbs.append(tk_img)
             self.tree.insert("", "end", iid=str(i), text=f"  Pág. {i+1}", image=tk_img)
         if self.doc.page_count > 0:
@@ -517,13 +556,18 @@ class EditPdfTab(ctk.CTkFrame):
             self.tree.selection_set(str(idx))
             self.tree.see(str(idx))
 
+    def _render_thumb(self, idx):
+        with FITZ_LOCK:
+            pix = self.doc[idx].get_pixmap(matrix=fitz.Matrix(self.THUMB_SCALE, self.THUMB_SCALE),
+                                            alpha=False)
+        im = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+        return _square_thumb(im)
+
     def _rebuild_thumb(self, idx):
         if not self.doc or idx >= self.doc.page_count:
             return
-        pg = self.doc[idx]
-        pix = pg.get_pixmap(matrix=fitz.Matrix(0.22, 0.22), alpha=False)
-        im = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        tk_img = ImageTk.PhotoImage(_square_thumb(im))
+        # Página modificada en memoria: no pasar por la caché en disco
+        tk_img = ImageTk.PhotoImage(self._render_thumb(idx))
         self.page_thumbs[idx] = tk_img
         self.tree.item(str(idx), image=tk_img)
 
@@ -539,7 +583,8 @@ class EditPdfTab(ctk.CTkFrame):
 
     # ─── Page state ──────────────────────────────────────────────────
     def _store_page_state(self):
-        if self.doc is None:
+        # Sin líneas extraídas todavía no hay nada editado que guardar
+        if self.doc is None or self._lines_key is not None:
             return
         self.page_states[self.current_page] = {
             "text_lines": [dict(l) for l in self.text_lines],
@@ -553,6 +598,7 @@ class EditPdfTab(ctk.CTkFrame):
             st = self.page_states[idx]
             self.text_lines = st["text_lines"]
             self.added_objects = st["added_objects"]
+            self._lines_key = None
         else:
             self._extract_lines()
             self.added_objects = []
@@ -560,11 +606,12 @@ class EditPdfTab(ctk.CTkFrame):
 
     # ─── Extract text LINE by LINE with SPANS ────────────────────────
     def _extract_lines(self):
+        """Vacía las líneas; _render las rellena cuando llega el texto de la página."""
+        self.text_lines = []
+        self._lines_key = (self.current_page, self._doc_version) if self.doc else None
+
+    def _lines_from_text(self, d):
         self.text_lines = []
-        if not self.doc:
-            return
-        page = self.doc[self.current_page]
-        d = page.get_text("dict", flags=fitz.TEXT_PRESERVE_WHITESPACE)
         for block in d.get("blocks", []):
             if block["type"] != 0:
                 continue
@@ -628,50 +675,53 @@ class EditPdfTab(ctk.CTkFrame):
             self.status_lbl.configure(text="Sin documento")
             return
 
-        page = self.doc[self.current_page]
+        info_key = (self.current_page, self._doc_version)
+        info = self._page_info.get(info_key)
+        if info is None:
+            if info_key != self._info_pending:
+                self._request_page_info(info_key)
+            self.canvas.delete("all")
+            self.status_lbl.configure(text=f"Cargando pág. {self.current_page+1}...")
+            return
+        page_rect, text = info
+        if self._lines_key == info_key:
+            self._lines_from_text(text)
+            self._lines_key = None
         cw = max(100, self.canvas.winfo_width())
         ch = max(100, self.canvas.winfo_height())
-        pw, ph = page.rect.width, page.rect.height
+        pw, ph = page_rect.width, page_rect.height
 
         if self.manual_zoom is not None:
             self.scale = self.manual_zoom
         else:
             self.scale = min((cw - 16) / pw, (ch - 16) / ph, 4.0)
 
-        mat = fitz.Matrix(self.scale, self.scale)
-        pix = page.get_pixmap(matrix=mat, alpha=False)
-        im = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-
-        draw = ImageDraw.Draw(im)
-        for ln in self.text_lines:
-            if ln.get("modified") or ln.get("deleted") or ln.get("moved"):
-                bb = ln["bbox_orig"]
-                x0 = int(bb[0] * self.scale) - 3
-                y0 = int(bb[1] * self.scale) - 5
-                x1 = int(bb[2] * self.scale) + 3
-                y1 = int(bb[3] * self.scale) + 5
-                draw.rectangle([x0, y0, x1, y1], fill="white")
-        # Blank areas under OCR overlays so scanned image text doesn't show
-        for obj in self.added_objects:
-            if obj.get("ocr"):
-                bb = obj["bbox"]
-                x0 = int(bb[0] * self.scale) - 2
-                y0 = int(bb[1] * self.scale) - 2
-                x1 = int(bb[2] * self.scale) + 2
-                y1 = int(bb[3] * self.scale) + 2
-                draw.rectangle([x0, y0, x1, y1], fill="white")
+        # Primera pasada: raster nítido si ya está, si no uno provisional; el
+        # nítido se pide a un hilo y sustituye al fondo cuando llega
+        key = (self.current_page, self.scale, self._doc_version)
+        ir = (page_rect * fitz.Matrix(self.scale, self.scale)).irect
+        if self._bg_key != key:
+            base = self._base_cache.get(key)
+            if base is None:
+                base = self._stand_in_raster((ir.width, ir.height))
+                if key != self._base_pending:
+                    self._request_base(key)
+                self._bg_key = None
+            else:
+                self._bg_key = key
+            # El fondo es la página tal cual: los blancos de texto editado y
+            # los overlays van encima como ítems del canvas
+            self.canvas_img_ref = ImageTk.PhotoImage(base)
 
-        self.offset_x = max(0, (cw - pix.width) // 2) if self.manual_zoom is None else 8
-        self.offset_y = max(0, (ch - pix.height) // 2) if self.manual_zoom is None else 8
+        self.offset_x = max(0, (cw - ir.width) // 2) if self.manual_zoom is None else 8
+        self.offset_y = max(0, (ch - ir.height) // 2) if self.manual_zoom is None else 8
 
         self.canvas.delete("all")
-        self._img_previews.clear()
-        self.canvas_img_ref = ImageTk.PhotoImage(im)
         self.canvas.create_image(self.offset_x, self.offset_y, anchor="nw",
                                   image=self.canvas_img_ref, tags="bg")
         self.canvas.configure(scrollregion=(0, 0,
-                                            pix.width + self.offset_x * 2,
-                                            pix.height + self.offset_y * 2))
+                                            ir.width + self.offset_x * 2,
+                                            ir.height + self.offset_y * 2))
         self._draw_overlays()
         ztext = "Ajustar" if self.manual_zoom is None else f"{self.scale*100:.0f}%"
         self.zoom_label.configure(text=ztext)
@@ -680,8 +730,142 @@ class EditPdfTab(ctk.CTkFrame):
                  f"{pw:.0f}\u00d7{ph:.0f} pt  |  Zoom {self.scale*100:.0f}%")
         self.canvas.focus_set()
 
+    def _stand_in_raster(self, size):
+        """Raster provisional: el de la misma página reescalado, la miniatura cacheada o blanco."""
+        key = self._base_key
+        if key is not None and key[0] == self.current_page and key[2] == self._doc_version:
+            return self._base_raster.resize(size, Image.Resampling.BILINEAR)
+        content = None
+        if self.pdf_path and not self.doc.is_dirty:
+            thumb = get_thumb_cache().get(self.pdf_path, self.current_page, 76, self.THUMB_SCALE)
+            content = thumbnail_content(thumb) if thumb is not None else None
+        if content is not None:
+            return content.resize(size, Image.Resampling.BILINEAR)
+        return Image.new("RGB", size, "white")
+
+    def _request_page_info(self, key):
+        self._info_gen += 1
+        self._info_pending = key
+        gen, doc = self._info_gen, self.doc
+        if self._info_worker is None:
+            self._info_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="editor-page")
+        fut = self._info_worker.submit(self._page_info_job, gen, doc, key)
+        fut.add_done_callback(lambda f: self._on_page_info_done(f, gen, key))
+
+    def _page_info_job(self, gen, doc, key):
+        # Hilo: otra página o un cambio del documento deja obsoleto este trabajo
+        page_idx = key[0]
+        with FITZ_LOCK:
+            if gen != self._info_gen or doc.is_closed or page_idx >= doc.page_count:
+                return None
+            page = doc[page_idx]
+            rect = page.rect
+            if gen != self._info_gen:
+                return None
+            text = page.get_text("dict", flags=fitz.TEXT_PRESERVE_WHITESPACE)
+        return rect, text
+
+    def _on_page_info_done(self, fut, gen, key):
+        if fut.cancelled():
+            return
+        info = None if fut.exception() is not None else fut.result()
+        try:
+            self.after(0, lambda: self._apply_page_info(gen, key, info))
+        except (RuntimeError, tk.TclError):
+            pass
+
+    def _apply_page_info(self, gen, key, info):
+        if gen != self._info_gen:
+            return
+        self._info_pending = None
+        if info is None:
+            self.status_lbl.configure(text=f"No se pudo leer la pág. {key[0]+1}")
+            return
+        self._page_info.put(key, info)
+        if key == (self.current_page, self._doc_version):
+            self._render()
+
+    def _request_base(self, key):
+        self._base_gen += 1
+        self._base_pending = key
+        gen, doc, path = self._base_gen, self.doc, self.pdf_path
+        if self._base_worker is None:
+            self._base_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="editor-render")
+        fut = self._base_worker.submit(self._render_base_job, gen, doc, path, key)
+        fut.add_done_callback(lambda f: self._on_base_done(f, gen, key))
+
+    def _render_base_job(self, gen, doc, path, key):
+        # Hilo de render: una página, zoom o cambio más nuevo deja obsoleto este trabajo.
+        # El raster se hace en un proceso hijo: get_pixmap retiene el GIL
+        page_idx, scale, version = key
+        with FITZ_LOCK:
+            if gen != self._base_gen or doc.is_closed or page_idx >= doc.page_count:
+                return None
+            if path and not doc.is_dirty:
+                source = path
+            else:
+                # Documento con cambios sin guardar: se envía solo esta página
+                data = self._page_pdfs.get((page_idx, version))
+                if data is None:
+                    single = fitz.open()
+                    single.insert_pdf(doc, from_page=page_idx, to_page=page_idx)
+                    data = single.tobytes()
+                    single.close()
+                    self._page_pdfs.put((page_idx, version), data)
+                source, page_idx = ((id(self), page_idx, version), data), 0
+        if gen != self._base_gen:
+            return None
+        return render_page(source, page_idx, scale, stale=lambda: gen != self._base_gen)
+
+    def _on_base_done(self, fut, gen, key):
+        if fut.cancelled():
+            return
+        im = None if fut.exception() is not None else fut.result()
+        try:
+            self.after(0, lambda: self._apply_base(gen, key, im))
+        except (RuntimeError, tk.TclError):
+            pass
+
+    def _apply_base(self, gen, key, im):
+        if gen != self._base_gen:
+            return
+        self._base_pending = None
+        if im is None:
+            return
+        self._base_key, self._base_raster = key, im
+        self._base_cache.put(key, im)
+        if key != (self.current_page, self.scale, self._doc_version):
+            return
+        # Misma página y escala que el fondo provisional: se cambia solo la
+        # imagen de fondo, sin tocar overlays ni una edición en curso
+        self._bg_key = key
+        self.canvas_img_ref = ImageTk.PhotoImage(im)
+        self.canvas.itemconfigure("bg", image=self.canvas_img_ref)
+
+    def destroy(self):
+        for worker in (self._base_worker, self._info_worker):
+            if worker is not None:
+                worker.shutdown(wait=False, cancel_futures=True)
+        super().destroy()
+
+    def _redraw_overlays(self):
+        """Repinta solo la capa de overlays; el raster de fondo no se toca."""
+        self.canvas.delete("overlay")
+        self._draw_overlays()
+        self.canvas.tag_raise("rz")
+
     def _draw_overlays(self):
         self._sel_rz_bbox = None
+        self._drawn_previews = []
+
+        # Tapa en blanco el texto original editado y las zonas OCR
+        for ln in self.text_lines:
+            if ln.get("modified") or ln.get("deleted") or ln.get("moved"):
+                self._draw_whiteout(ln["bbox_orig"], 3, 5)
+        # Blank areas under OCR overlays so scanned image text doesn't show
+        for obj in self.added_objects:
+            if obj.get("ocr"):
+                self._draw_whiteout(obj["bbox"], 2, 2)
 
         for i, ln in enumerate(self.text_lines):
             if ln["deleted"]:
@@ -694,12 +878,12 @@ class EditPdfTab(ctk.CTkFrame):
             is_sel = ln is self.selected
             if is_sel:
                 self.canvas.create_rectangle(x0 - 1, y0 - 1, x1 + 1, y1 + 1,
-                                              outline="#3c7bff", width=2, fill="", tags="sel")
+                                              outline="#3c7bff", width=2, fill="", tags=("overlay", "sel"))
                 self._sel_rz_bbox = (x1 - 4, y1 - 4, x1 + 4, y1 + 4)
                 self.canvas.create_rectangle(*self._sel_rz_bbox,
-                    fill="#3c7bff", outline="#1a50cc", tags="sel_rz")
+                    fill="#3c7bff", outline="#1a50cc", tags=("overlay", "sel_rz"))
             else:
-                self.canvas.create_rectangle(x0, y0, x1, y1, outline="", fill="", tags=f"hit_{i}")
+                self.canvas.create_rectangle(x0, y0, x1, y1, outline="", fill="", tags=("overlay", f"hit_{i}"))
 
         for j, obj in enumerate(self.added_objects):
             x0, y0, x1, y1 = self._pdf_to_canvas_rect(obj["bbox"])
@@ -715,13 +899,21 @@ class EditPdfTab(ctk.CTkFrame):
                 self.canvas.create_rectangle(x0, y0, x1, y1,
                     outline=border,
                     width=2 if is_sel else 1, dash=() if is_sel else (3, 2),
-                    fill="", tags=f"abox_{j}")
+                    fill="", tags=("overlay", f"abox_{j}"))
             elif obj["type"] == "image":
                 self._draw_image_preview(obj, x0, y0, x1, y1, is_sel)
             if is_sel:
                 self._sel_rz_bbox = (x1 - 4, y1 - 4, x1 + 4, y1 + 4)
                 self.canvas.create_rectangle(*self._sel_rz_bbox,
-                    fill="#3c7bff", outline="#1a50cc", tags="sel_rz")
+                    fill="#3c7bff", outline="#1a50cc", tags=("overlay", "sel_rz"))
+
+    def _draw_whiteout(self, bb, mx, my):
+        x0 = int(bb[0] * self.scale) - mx + self.offset_x
+        y0 = int(bb[1] * self.scale) - my + self.offset_y
+        x1 = int(bb[2] * self.scale) + mx + self.offset_x
+        y1 = int(bb[3] * self.scale) + my + self.offset_y
+        self.canvas.create_rectangle(x0, y0, x1 + 1, y1 + 1, fill="white", outline="",
+                                     tags="overlay")
 
     def _draw_spans_on_canvas(self, item, x0, y0, y1):
         spans = item.get("spans", [])
@@ -751,12 +943,15 @@ class EditPdfTab(ctk.CTkFrame):
     def _draw_image_preview(self, obj, x0, y0, x1, y1, is_sel):
         w = max(4, int(x1 - x0))
         h = max(4, int(y1 - y0))
+        key = (obj["image_path"], w, h)
         try:
-            with Image.open(obj["image_path"]) as raw:
-                preview = _fit(raw.convert("RGB"), w, h)
-                tk_img = ImageTk.PhotoImage(preview)
-                self._img_previews.append(tk_img)
-                self.canvas.create_image((x0 + x1) / 2, (y0 + y1) / 2, image=tk_img, tags="overlay")
+            tk_img = self._img_previews.get(key)
+            if tk_img is None:
+                with Image.open(obj["image_path"]) as raw:
+                    tk_img = ImageTk.PhotoImage(_fit(raw.convert("RGB"), w, h))
+                self._img_previews.put(key, tk_img)
+            self._drawn_previews.append(tk_img)
+            self.canvas.create_image((x0 + x1) / 2, (y0 + y1) / 2, image=tk_img, tags="overlay")
         except Exception:
             self.canvas.create_text((x0 + x1) / 2, (y0 + y1) / 2,
                                      text=os.path.basename(obj.get("image_path", "?")),
@@ -809,16 +1004,17 @@ class EditPdfTab(ctk.CTkFrame):
         if self.selected is item:
             return
         self.selected = item
-        self._render()
+        self._redraw_overlays()
 
     def _deselect(self):
         if self.selected is not None:
             self.selected = None
-            self._render()
+            self._redraw_overlays()
 
     # ─── Canvas events ───────────────────────────────────────────────
     def _on_press(self, event):
-        if not self.doc:
+        # Sin líneas de la página todavía no hay nada que seleccionar ni editar
+        if not self.doc or self._lines_key is not None:
             return
         self._commit_edit()
 
@@ -862,7 +1058,7 @@ class EditPdfTab(ctk.CTkFrame):
             min_w = 10 / self.scale
             min_h = 10 / self.scale
             item["bbox"] = [ob[0], ob[1], max(ob[0] + min_w, px), max(ob[1] + min_h, py)]
-            self._render()
+            self._redraw_overlays()
             return
         if self.mode == "select" and self._drag_data:
             cx = self.canvas.canvasx(event.x)
@@ -937,7 +1133,7 @@ class EditPdfTab(ctk.CTkFrame):
             elif self.selected in self.added_objects:
                 self.added_objects.remove(self.selected)
             self.selected = None
-            self._render()
+            self._redraw_overlays()
 
     # ─── Drag to move ────────────────────────────────────────────────
     def _do_drag(self, event):
@@ -949,7 +1145,7 @@ class EditPdfTab(ctk.CTkFrame):
         dy = (cy - d["sy"]) / self.scale
         ob = d["orig_bbox"]
         item["bbox"] = [ob[0] + dx, ob[1] + dy, ob[2] + dx, ob[3] + dy]
-        self._render()
+        self._redraw_overlays()
 
     def _end_drag(self):
         d = self._drag_data
@@ -1290,7 +1486,7 @@ class EditPdfTab(ctk.CTkFrame):
         self._format_tags = {}
         self._hide_style_toolbar()
         self._hide_resize_handle()
-        self._render()
+        self._redraw_overlays()
 
     def _cancel_edit(self):
         if self._edit_widget:
@@ -1331,16 +1527,17 @@ class EditPdfTab(ctk.CTkFrame):
         obj = {"type": "image", "bbox": rect, "image_path": path}
         self.added_objects.append(obj)
         self._select(obj)
-        self._render()
+        self._redraw_overlays()
 
     # ─── Highlight ───────────────────────────────────────────────────
     def _apply_highlight(self, rect):
         self._push_undo()
-        page = self.doc[self.current_page]
         try:
-            a = page.add_highlight_annot(fitz.Rect(rect))
-            a.set_colors(stroke=(1, 1, 0))
-            a.update()
+            with FITZ_LOCK:
+                a = self.doc[self.current_page].add_highlight_annot(fitz.Rect(rect))
+                a.set_colors(stroke=(1, 1, 0))
+                a.update()
+            self._doc_version += 1
         except Exception as e:
             messagebox.showerror("Error", str(e))
         if self.current_page in self.page_states:
@@ -1353,8 +1550,10 @@ class EditPdfTab(ctk.CTkFrame):
     def _rotate(self, angle):
         if not self.doc:
             return
-        page = self.doc[self.current_page]
-        page.set_rotation((page.rotation + angle) % 360)
+        with FITZ_LOCK:
+            page = self.doc[self.current_page]
+            page.set_rotation((page.rotation + angle) % 360)
+        self._doc_version += 1
         if self.current_page in self.page_states:
             del self.page_states[self.current_page]
         self._extract_lines()
@@ -1370,7 +1569,9 @@ class EditPdfTab(ctk.CTkFrame):
             return
         if self.current_page in self.page_states:
             del self.page_states[self.current_page]
-        self.doc.delete_page(self.current_page)
+        with FITZ_LOCK:
+            self.doc.delete_page(self.current_page)
+        self._doc_version += 1
         if self.current_page >= self.doc.page_count:
             self.current_page = self.doc.page_count - 1
         new_states = {}
@@ -1386,7 +1587,8 @@ class EditPdfTab(ctk.CTkFrame):
     def _extract_text_to_box(self):
         if not self.doc:
             return
-        text = self.doc[self.current_page].get_text()
+        with FITZ_LOCK:
+            text = self.doc[self.current_page].get_text()
         self.ocr_box.delete("1.0", "end")
         self.ocr_box.insert("1.0", text.strip() or "(Sin texto embebido)")
 
@@ -1403,16 +1605,18 @@ class EditPdfTab(ctk.CTkFrame):
         self.hint_lbl.configure(text="Procesando OCR...")
         self.update_idletasks()
 
-        pix = self.doc[self.current_page].get_pixmap(dpi=300, alpha=False)
+        with FITZ_LOCK:
+            pix = self.doc[self.current_page].get_pixmap(dpi=300, alpha=False)
         im = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        img_np = np.array(im)
         ocr_scale = 300.0 / 72.0
 
         def do_ocr():
             try:
+                import numpy as np
                 if self._ocr_reader is None:
+                    from rapidocr_onnxruntime import RapidOCR
                     self._ocr_reader = RapidOCR()
-                results, _ = self._ocr_reader(img_np)
+                results, _ = self._ocr_reader(np.array(im))
                 self.after(0, lambda r=results: self._apply_ocr_results(r, ocr_scale))
             except Exception as e:
                 self.after(0, lambda: messagebox.showerror("Error OCR", str(e)))
@@ -1493,13 +1697,14 @@ class EditPdfTab(ctk.CTkFrame):
         except Exception as e:
             messagebox.showerror("Error", f"No se pudo abrir la imagen.\n\n{e}")
             return
-        img_np = np.array(im)
 
         def do_ocr():
             try:
+                import numpy as np
                 if self._ocr_reader is None:
+                    from rapidocr_onnxruntime import RapidOCR
                     self._ocr_reader = RapidOCR()
-                results, _ = self._ocr_reader(img_np)
+                results, _ = self._ocr_reader(np.array(im))
                 if results:
                     text = "\n".join(r[1] for r in results)
                 else:
@@ -0,0 +1,920 @@
+# page_export.py  –  Exportación de páginas PDF a imagen (pipeline con hilos o varios procesos)
+import hashlib
+import io
+import json
+import os
+import queue
+import re
+import shutil
+import struct
+import threading
+import time
+import zipfile
+import zlib
+import multiprocessing
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+import fitz  # PyMuPDF
+
+from render_cache import FITZ_LOCK, get_doc_pool
+
+
+# colorspace: "RGB", "GRAY" o "1" (bilevel con umbral 0-255 sobre el gris)
+ExportOptions = namedtuple("ExportOptions", "dpi fmt quality colorspace threshold",
+                           defaults=("RGB", 128))
+COLORSPACES = ("RGB", "GRAY", "1")
+
+PART_SUFFIX = ".part"
+
+# Páginas cuyo raster completo supera este tamaño se renderizan por bandas
+TILE_THRESHOLD_PIXELS = 40_000_000
+BAND_BYTES = 32 * 1024 * 1024   # tamaño objetivo de cada banda RGB
+BAND_OVERLAP_PT = 6             # margen renderizado por encima y por debajo de cada banda
+JPEG_MAX_SIDE = 65535           # el marcador SOF guarda ancho y alto en 16 bits
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+class ExportStats:
+    """Contadores por etapa (páginas y segundos ocupados) para ajustar los pools."""
+
+    STAGES = ("render", "encode", "write")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.items = dict.fromkeys(self.STAGES, 0)
+        self.busy = dict.fromkeys(self.STAGES, 0.0)
+        self.done = 0  # páginas ya publicadas
+        self.started = time.perf_counter()
+
+    def add(self, stage, seconds, n=1):
+        with self._lock:
+            self.items[stage] += n
+            self.busy[stage] += seconds
+
+    def merge(self, counts):
+        """Suma los contadores {etapa: (páginas, segundos)} de un proceso de trabajo."""
+        with self._lock:
+            for stage, (n, seconds) in counts.items():
+                self.items[stage] += n
+                self.busy[stage] += seconds
+
+    def summary(self):
+        """Páginas/s de cada etapa por hilo ocupado, y total real transcurrido."""
+        with self._lock:
+            rates = [f"{stage} {self.items[stage] / self.busy[stage]:.1f}"
+                     for stage in self.STAGES if self.busy[stage] > 0]
+        elapsed = max(time.perf_counter() - self.started, 1e-6)
+        rates.append(f"total {self.done / elapsed:.1f} pág/s")
+        return " · ".join(rates)
+
+
+def render_page(doc, page_idx, opts):
+    scale = opts.dpi / 72.0
+    return doc[page_idx].get_pixmap(matrix=fitz.Matrix(scale, scale),
+                                    colorspace=_fitz_colorspace(opts), alpha=False)
+
+
+def _fitz_colorspace(opts):
+    # Gris y 1 bit se renderizan directamente en gris (1 byte por píxel)
+    return fitz.csRGB if opts.colorspace == "RGB" else fitz.csGRAY
+
+
+def _samples(pix):
+    # samples_mv es una vista sin copia; pix.samples copia todo el buffer a bytes
+    return pix.samples_mv if hasattr(pix, "samples_mv") else pix.samples
+
+
+def _threshold_table(threshold):
+    return [0] * threshold + [255] * (256 - threshold)
+
+
+def pixmap_to_image(pix, opts=None):
+    """Imagen PIL leída directamente del buffer del pixmap (sin copia intermedia a bytes).
+
+    Con opts.colorspace == "1" se umbraliza a una imagen bilevel.
+    """
+    mode = "L" if pix.n == 1 else "RGB"
+    im = Image.frombuffer(mode, (pix.width, pix.height), _samples(pix), "raw", mode, pix.stride, 1)
+    if opts is not None and opts.colorspace == "1":
+        im = im.point(_threshold_table(opts.threshold), "1")
+    return im
+
+
+def check_options(opts):
+    if opts.colorspace not in COLORSPACES:
+        raise ValueError(f"Espacio de color no soportado: {opts.colorspace}")
+    if opts.fmt == "JPG" and opts.colorspace == "1":
+        raise ValueError("JPG no admite imágenes de 1 bit; usa PNG o TIFF.")
+
+
+def save_image(im, out, opts, **extra):
+    """Codifica una imagen PIL ya en el modo final (RGB, L o 1) con el formato de opts."""
+    if opts.fmt == "JPG":
+        im.save(out, "JPEG", quality=opts.quality, **extra)
+    elif opts.fmt == "TIFF":
+        compression = "group4" if im.mode == "1" else "tiff_deflate"
+        im.save(out, "TIFF", compression=compression, **extra)
+    else:
+        im.save(out, "PNG", **extra)
+
+
+def encode_pixmap(pix, opts):
+    """Codifica el pixmap a bytes con PIL, leyendo directamente su buffer.
+
+    pix.tobytes() retiene el GIL mientras comprime; PIL lo suelta al
+    codificar PNG y JPEG, así que los hilos codificadores sí trabajan en
+    paralelo y no frenan la interfaz.
+    """
+    buf = io.BytesIO()
+    save_image(pixmap_to_image(pix, opts), buf, opts)
+    return buf.getvalue()
+
+
+def save_pixmap(pix, out_path, opts):
+    data = encode_pixmap(pix, opts)
+    with open(out_path, "wb") as f:
+        f.write(data)
+
+
+def export_page(doc, page_idx, out_path, opts):
+    check_options(opts)
+    if needs_tiling(doc, page_idx, opts):
+        export_page_tiled(doc, page_idx, out_path, opts)
+    else:
+        save_pixmap(render_page(doc, page_idx, opts), out_path, opts)
+
+
+# ── Exportación por bandas (páginas enormes a alta resolución) ──────
+def _page_irect(doc, page_idx, opts):
+    scale = opts.dpi / 72.0
+    mat = fitz.Matrix(scale, scale)
+    return mat, (doc[page_idx].rect * mat).irect
+
+
+def needs_tiling(doc, page_idx, opts):
+    _, ir = _page_irect(doc, page_idx, opts)
+    return ir.width * ir.height > TILE_THRESHOLD_PIXELS
+
+
+def _band_height(width, opts):
+    n = 3 if opts.colorspace == "RGB" else 1
+    h = max(16, BAND_BYTES // max(1, width * n))
+    if opts.fmt == "JPG":
+        # Múltiplo de la MCU (16 px en 4:2:0, 8 px en gris) y como mucho
+        # 65535 MCUs por intervalo de reinicio
+        mcu = 16 if opts.colorspace == "RGB" else 8
+        h = min(h, 65535 // -(-width // mcu) * mcu)
+        h = max(mcu, h // mcu * mcu)
+    return h
+
+
+def iter_bands(doc, page_idx, opts, band_h):
+    """Genera (ancho, alto_total, bandas), cada banda un Pixmap de band_h filas.
+
+    Las bandas salen de una display list y toman FITZ_LOCK solo mientras se
+    renderizan, así que el documento no tiene que seguir bloqueado al iterarlas.
+    """
+    mat, ir = _page_irect(doc, page_idx, opts)
+    dl = doc[page_idx].get_displaylist()
+    inv = ~mat
+    cs = _fitz_colorspace(opts)
+    overlap = max(8, int(BAND_OVERLAP_PT * mat.a + 1))
+
+    def bands():
+        for y in range(ir.y0, ir.y1, band_h):
+            band = fitz.IRect(ir.x0, y, ir.x1, min(y + band_h, ir.y1))
+            # MuPDF suaviza distinto junto al borde del recorte: se renderiza
+            # con margen y se copia solo la banda, así no quedan costuras
+            clip = fitz.Rect(ir.x0, max(ir.y0, band.y0 - overlap),
+                             ir.x1, min(ir.y1, band.y1 + overlap)) * inv
+            with FITZ_LOCK:
+                pix = dl.get_pixmap(matrix=mat, colorspace=cs, clip=clip, alpha=False)
+                out = fitz.Pixmap(cs, band, False)
+                out.copy(pix, band)
+                del pix
+            yield out
+
+    return ir.width, ir.height, bands()
+
+
+def _png_chunk(tag, data):
+    return (struct.pack(">I", len(data)) + tag + data
+            + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF))
+
+
+def write_png_bands(f, width, height, bands, opts):
+    """PNG (RGB, gris o 1 bit) escrito banda a banda, con IDAT en flujo."""
+    if opts.colorspace == "1":
+        depth, color_type, row_bytes = 1, 0, (width + 7) // 8
+    elif opts.colorspace == "GRAY":
+        depth, color_type, row_bytes = 8, 0, width
+    else:
+        depth, color_type, row_bytes = 8, 2, width * 3
+    f.write(b"\x89PNG\r\n\x1a\n")
+    f.write(_png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, depth, color_type, 0, 0, 0)))
+    comp = zlib.compressobj(6)
+    for pix in bands:
+        if opts.colorspace == "1":
+            # El modo "1" de PIL empaqueta 8 píxeles por byte, 1 = blanco, como PNG
+            samples, stride = pixmap_to_image(pix, opts).tobytes(), row_bytes
+        else:
+            samples, stride = _samples(pix), pix.stride
+        rows = bytearray()
+        for y in range(pix.height):
+            rows += b"\x00"  # filtro "None" por fila
+            rows += samples[y * stride:y * stride + row_bytes]
+        data = comp.compress(bytes(rows))
+        if data:
+            f.write(_png_chunk(b"IDAT", data))
+    f.write(_png_chunk(b"IDAT", comp.flush()))
+    f.write(_png_chunk(b"IEND", b""))
+
+
+def _split_jpeg(data):
+    """Separa un JPEG baseline en (cabecera hasta SOS, segmento SOS, datos de escaneo)."""
+    pos = 2  # tras SOI
+    while pos < len(data):
+        marker = data[pos + 1]
+        length = struct.unpack(">H", data[pos + 2:pos + 4])[0]
+        if marker == 0xDA:
+            end = pos + 2 + length
+            if data[-2:] != b"\xff\xd9":
+                raise ValueError("JPEG sin EOI")
+            return data[:pos], data[pos:end], data[end:-2]
+        pos += 2 + length
+    raise ValueError("JPEG sin SOS")
+
+
+def write_jpeg_bands(f, width, height, bands, band_h, opts):
+    """JPEG baseline unido a partir de bandas codificadas por separado.
+
+    Todas las bandas usan las mismas tablas (calidad fija, 4:2:0 o gris,
+    Huffman estándar) y ocupan filas de MCU completas, así que sus datos de
+    escaneo se concatenan separados por marcadores RST; un DRI con las MCUs
+    de una banda reinicia la predicción DC en cada frontera.
+    """
+    if width > JPEG_MAX_SIDE or height > JPEG_MAX_SIDE:
+        raise ValueError(f"La página mide {width}x{height} px y JPEG admite como mucho "
+                         f"{JPEG_MAX_SIDE} px por lado; usa PNG o TIFF o baja los DPI.")
+    mcu = 16 if opts.colorspace == "RGB" else 8
+    mcus_per_band = (band_h // mcu) * -(-width // mcu)
+    extra = {"subsampling": 2} if opts.colorspace == "RGB" else {}
+    for i, pix in enumerate(bands):
+        buf = io.BytesIO()
+        pixmap_to_image(pix).save(buf, "JPEG", quality=opts.quality, optimize=False,
+                                  progressive=False, **extra)
+        header, sos, scan = _split_jpeg(buf.getvalue())
+        if i == 0:
+            sof = header.find(b"\xff\xc0")
+            if sof < 0:
+                raise ValueError("JPEG no baseline")
+            header = header[:sof + 5] + struct.pack(">H", height) + header[sof + 7:]
+            f.write(header)
+            f.write(b"\xff\xdd" + struct.pack(">HH", 4, mcus_per_band))
+            f.write(sos)
+        else:
+            f.write(bytes((0xFF, 0xD0 + (i - 1) % 8)))
+        f.write(scan)
+    f.write(b"\xff\xd9")
+
+
+def _tiff_ifd(entries, pos):
+    """Serializa un IFD little-endian. entries = {tag: (tipo, valores)}; tipos SHORT, LONG, RATIONAL."""
+    fmts = {3: "<H", 4: "<I", 5: "<II"}
+    n = len(entries)
+    aux_pos = pos + 2 + 12 * n + 4
+    out, aux = [struct.pack("<H", n)], bytearray()
+    for tag in sorted(entries):
+        typ, values = entries[tag]
+        data = b"".join(struct.pack(fmts[typ], *(v if typ == 5 else (v,))) for v in values)
+        if len(data) <= 4:
+            field = data.ljust(4, b"\x00")
+        else:
+            if (aux_pos + len(aux)) % 2:
+                aux += b"\x00"
+            field = struct.pack("<I", aux_pos + len(aux))
+            aux += data
+        out.append(struct.pack("<HHI", tag, typ, len(values)) + field)
+    out.append(b"\x00\x00\x00\x00")  # siguiente IFD: se enlaza después
+    return b"".join(out) + bytes(aux)
+
+
+class TiffStripWriter:
+    """TIFF escrito en flujo, página a página y tira a tira.
+
+    Cada página (o cada banda de una página enorme) la codifica PIL como un
+    TIFF de una página (deflate o Group 4); de ahí se copian las tiras
+    comprimidas y el IFD de la página se escribe al final, enlazado desde el
+    anterior. Así se encadenan páginas sin tener ninguna completa en memoria,
+    y el archivo es válido tras cada página añadida.
+    """
+
+    _COPIED_TAGS = (258, 259, 262, 266, 277, 284, 317)  # bits, compresión, fotométrica...
+    _COPY_CHUNK = 1024 * 1024
+    _MAX_OFFSET = 0xFFFFFFFF  # TIFF clásico: desplazamientos de 32 bits
+
+    def __init__(self, f):
+        self.f = f
+        self.f.write(b"II*\x00")
+        self._next_ifd_ptr = self.f.tell()
+        self.f.write(b"\x00\x00\x00\x00")
+
+    def add_page(self, width, height, rows_per_strip, bands, opts):
+        """Añade una página a partir de sus bandas (pixmaps de rows_per_strip filas)."""
+        offsets, counts, entries = [], [], None
+        for pix in bands:
+            buf = io.BytesIO()
+            im = pixmap_to_image(pix, opts)
+            save_image(im, buf, opts, strip_size=2 ** 31 - 1)
+            del im  # la imagen comparte el buffer del pixmap: se suelta antes que él
+            band_entries = self._copy_strips(buf, offsets, counts)
+            entries = entries or band_entries
+        entries[256] = (4, (width,))
+        entries[257] = (4, (height,))
+        entries[278] = (4, (rows_per_strip,))
+        self._write_ifd(entries, offsets, counts, opts)
+
+    def append_tiff(self, src, opts):
+        """Añade como página un TIFF de una página ya codificado (archivo o BytesIO)."""
+        offsets, counts = [], []
+        entries = self._copy_strips(src, offsets, counts, geometry=True)
+        self._write_ifd(entries, offsets, counts, opts)
+
+    def _copy_strips(self, src, offsets, counts, geometry=False):
+        """Copia las tiras de src al final del archivo y devuelve sus etiquetas de formato."""
+        with Image.open(src) as im:
+            tags = im.tag_v2
+            strips = list(zip(tags[273], tags[279]))
+            copied = self._COPIED_TAGS + ((256, 257, 278) if geometry else ())
+            entries = {}
+            for tag in copied:
+                if tag in tags:
+                    value = tags[tag]
+                    typ = 4 if tag in (256, 257, 278) else 3
+                    entries[tag] = (typ, tuple(value) if isinstance(value, tuple) else (value,))
+        for off, n in strips:
+            self._align()
+            offsets.append(self.f.tell())
+            counts.append(n)
+            src.seek(off)
+            while n > 0:
+                chunk = src.read(min(n, self._COPY_CHUNK))
+                if not chunk:
+                    raise ValueError("TIFF truncado")
+                self.f.write(chunk)
+                n -= len(chunk)
+        return entries
+
+    def _write_ifd(self, entries, offsets, counts, opts):
+        entries[273] = (4, tuple(offsets))
+        entries[279] = (4, tuple(counts))
+        entries[282] = entries[283] = (5, ((opts.dpi, 1),))
+        entries[296] = (3, (2,))  # resolución en pulgadas
+
+        self._align()
+        pos = self.f.tell()
+        ifd = _tiff_ifd(entries, pos)
+        if pos + len(ifd) > self._MAX_OFFSET:
+            raise ValueError("El TIFF supera 4 GB; exporta a ZIP o a carpeta.")
+        self.f.write(ifd)
+        end = self.f.tell()
+        # Enlaza esta página desde el encabezado o desde el IFD anterior
+        self.f.seek(self._next_ifd_ptr)
+        self.f.write(struct.pack("<I", pos))
+        self.f.seek(end)
+        self._next_ifd_ptr = pos + 2 + 12 * len(entries)
+
+    def _align(self):
+        if self.f.tell() % 2:
+            self.f.write(b"\x00")
+
+
+def export_page_tiled(doc, page_idx, out_path, opts):
+    """Renderiza y codifica la página por bandas: la memoria depende de la banda, no de la página."""
+    write_bands(out_path, *tiled_bands(doc, page_idx, opts), opts)
+
+
+def tiled_bands(doc, page_idx, opts):
+    """(ancho, alto, alto de banda, bandas) de la página; las bandas se renderizan al iterarlas."""
+    _, ir = _page_irect(doc, page_idx, opts)
+    band_h = _band_height(ir.width, opts)
+    width, height, bands = iter_bands(doc, page_idx, opts, band_h)
+    return width, height, band_h, bands
+
+
+def write_bands(out_path, width, height, band_h, bands, opts):
+    """Codifica y escribe las bandas de tiled_bands(); no necesita el documento."""
+    with open(out_path, "wb") as f:
+        if opts.fmt == "JPG":
+            write_jpeg_bands(f, width, height, bands, band_h, opts)
+        elif opts.fmt == "TIFF":
+            TiffStripWriter(f).add_page(width, height, band_h, bands, opts)
+        else:
+            write_png_bands(f, width, height, bands, opts)
+
+
+# ── Procesos de trabajo ─────────────────────────────────────────────
+# Cada proceso abre su propia copia del documento una sola vez.
+_worker_doc = None
+
+
+def _worker_init(pdf_path):
+    global _worker_doc
+    _worker_doc = fitz.open(pdf_path)
+
+
+def _worker_export_slice(jobs, opts):
+    """Renderiza un tramo de páginas a sus archivos de spool. jobs = [(página, ruta)].
+
+    Devuelve los contadores de etapa {etapa: (páginas, segundos)} del tramo.
+    """
+    stats = ExportStats()
+    for page_idx, part in jobs:
+        t0 = time.perf_counter()
+        if needs_tiling(_worker_doc, page_idx, opts):
+            # Render y codificación van intercalados por bandas: se cuentan como render
+            export_page_tiled(_worker_doc, page_idx, part, opts)
+            stats.add("render", time.perf_counter() - t0)
+            continue
+        pix = render_page(_worker_doc, page_idx, opts)
+        t1 = time.perf_counter()
+        data = encode_pixmap(pix, opts)
+        t2 = time.perf_counter()
+        with open(part, "wb") as f:
+            f.write(data)
+        stats.add("render", t1 - t0)
+        stats.add("encode", t2 - t1)
+        stats.add("write", time.perf_counter() - t2)
+    return {st: (stats.items[st], stats.busy[st]) for st in ExportStats.STAGES}
+
+
+# ── Pipeline en el propio proceso: render → codificadores → escritura ──
+_STOP = object()
+
+
+def _put(q, item, abort):
+    # put con contrapresión que se puede interrumpir
+    while not abort.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+class _FolderSink:
+    """Destino por defecto: un archivo por página, publicado renombrando su .part."""
+
+    def spool_path(self, job):
+        return job[1] + PART_SUFFIX
+
+    def write(self, job, data):
+        part = job[1] + PART_SUFFIX
+        if data is not None:
+            with open(part, "wb") as f:
+                f.write(data)
+        os.replace(part, job[1])
+
+    def discard(self, jobs):
+        _discard_parts(jobs)
+
+
+def _pipeline_export(pdf_path, jobs, opts, encoders, progress, cancel, stats, sink=None):
+    """Un hilo renderiza en orden, `encoders` hilos comprimen y el llamador escribe.
+
+    Las colas acotadas frenan al renderizador cuando los codificadores o el
+    disco no dan abasto, así que solo hay unos pocos pixmaps en memoria. El
+    escritor reordena y entrega cada página a `sink` en el orden de jobs; las
+    páginas por bandas llegan ya escritas en sink.spool_path(job).
+    """
+    sink = sink or _FolderSink()
+    abort = threading.Event()
+    errors = []
+    render_q = queue.Queue(maxsize=encoders * 2)
+    encoded_q = queue.Queue(maxsize=encoders * 2)
+
+    def render_stage():
+        try:
+            for seq, job in enumerate(jobs):
+                if abort.is_set() or (cancel is not None and cancel.is_set()):
+                    break
+                page_idx = job[0]
+                t0 = time.perf_counter()
+                tiled = pix = None
+                with get_doc_pool().document(pdf_path) as doc:
+                    if needs_tiling(doc, page_idx, opts):
+                        tiled = tiled_bands(doc, page_idx, opts)
+                    else:
+                        pix = render_page(doc, page_idx, opts)
+                if tiled is not None:
+                    # Las bandas se codifican a medida que se renderizan; fuera
+                    # del pool, FITZ_LOCK solo se toma para renderizar cada banda
+                    write_bands(sink.spool_path(job), *tiled, opts)
+                stats.add("render", time.perf_counter() - t0)
+                if not _put(render_q, (seq, pix), abort):
+                    break
+        except BaseException as e:
+            errors.append(e)
+            abort.set()
+        finally:
+            for _ in range(encoders):
+                _put(render_q, _STOP, abort)
+
+    def encode_stage():
+        try:
+            while not abort.is_set():
+                try:
+                    item = render_q.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is _STOP:
+                    break
+                seq, pix = item
+                data = None
+                if pix is not None:
+                    t0 = time.perf_counter()
+                    data = encode_pixmap(pix, opts)
+                    stats.add("encode", time.perf_counter() - t0)
+                if not _put(encoded_q, (seq, data), abort):
+                    break
+        except BaseException as e:
+            errors.append(e)
+            abort.set()
+        finally:
+            _put(encoded_q, _STOP, abort)
+
+    threads = [threading.Thread(target=render_stage, name="export-render", daemon=True)]
+    threads += [threading.Thread(target=encode_stage, name=f"export-encode-{i}", daemon=True)
+                for i in range(encoders)]
+    for t in threads:
+        t.start()
+
+    pending = {}
+    done = 0
+    stopped = 0
+    try:
+        while done < len(jobs) and stopped < encoders and not abort.is_set():
+            if cancel is not None and cancel.is_set():
+                raise ExportCancelled()
+            try:
+                item = encoded_q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _STOP:
+                stopped += 1
+                continue
+            pending[item[0]] = item[1]
+            while done in pending:
+                data = pending.pop(done)
+                t0 = time.perf_counter()
+                sink.write(jobs[done], data)
+                stats.add("write", time.perf_counter() - t0)
+                done += 1
+                stats.done = done
+                if progress:
+                    progress(done)
+        if errors:
+            raise errors[0]
+        if done < len(jobs):
+            raise ExportCancelled()
+        return done
+    finally:
+        abort.set()
+        for t in threads:
+            t.join()
+        sink.discard(jobs[done:])
+
+
+def _slices(jobs, workers):
+    # Tramos pequeños: reparto equilibrado y progreso/cancelación frecuentes
+    size = max(1, min(8, len(jobs) // (workers * 4)))
+    return [jobs[i:i + size] for i in range(0, len(jobs), size)]
+
+
+def _discard_parts(jobs):
+    for _, out_path in jobs:
+        try:
+            os.remove(out_path + PART_SUFFIX)
+        except OSError:
+            pass
+
+
+def export_pages(pdf_path, jobs, opts, workers=1, encoders=2, progress=None, cancel=None,
+                 stats=None, sink=None):
+    """Exporta jobs = [(página, ruta de salida)] y devuelve cuántas páginas escribió.
+
+    Con workers > 1 cada proceso abre el PDF y renderiza tramos de páginas
+    a sus archivos de spool; con workers == 1 se usa el pipeline de hilos
+    con `encoders` codificadores. Las páginas se entregan a `sink` (por
+    defecto, publicar cada .part) estrictamente en el orden de jobs, así que
+    una exportación cancelada o fallida deja siempre un prefijo contiguo.
+    """
+    stats = stats if stats is not None else ExportStats()
+    sink = sink or _FolderSink()
+    slices = _slices(jobs, max(1, workers))
+    if workers <= 1 or len(slices) <= 1:
+        return _pipeline_export(pdf_path, jobs, opts, max(1, encoders), progress, cancel, stats,
+                                sink=sink)
+
+    done = 0
+    pool = None
+    try:
+        pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+            initializer=_worker_init, initargs=(pdf_path,))
+        futures = [pool.submit(_worker_export_slice, [(job[0], sink.spool_path(job)) for job in s],
+                               opts)
+                   for s in slices]
+
+        for part, fut in zip(slices, futures):
+            if cancel is not None and cancel.is_set():
+                raise ExportCancelled()
+            stats.merge(fut.result())
+            for job in part:
+                sink.write(job, None)
+                done += 1
+                stats.done = done
+            if progress:
+                progress(done)
+        return done
+    except BaseException:
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+            pool = None
+        sink.discard(jobs[done:])
+        raise
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+# ── Exportación a un único archivo contenedor ───────────────────────
+# Evita crear miles de archivos sueltos (caro en carpetas de red)
+CONTAINERS = {"TIFF": ".tif", "ZIP": ".zip"}
+
+
+class _ContainerSink:
+    """Escribe todas las páginas, en orden, dentro de un solo archivo .part.
+
+    Las páginas por bandas se escriben antes en un archivo temporal junto
+    al destino y se copian al contenedor por trozos.
+    """
+
+    def __init__(self, out_path):
+        self.out_path = out_path
+        self.part = out_path + PART_SUFFIX
+        self.f = open(self.part, "wb")
+
+    def spool_path(self, job):
+        return f"{self.out_path}.{job[0] + 1}{PART_SUFFIX}"
+
+    def write(self, job, data):
+        if data is not None:
+            self._add(job, io.BytesIO(data))
+            return
+        spool = self.spool_path(job)
+        try:
+            with open(spool, "rb") as src:
+                self._add(job, src)
+        finally:
+            os.remove(spool)
+
+    def discard(self, jobs):
+        for job in jobs:
+            try:
+                os.remove(self.spool_path(job))
+            except OSError:
+                pass
+
+    def close(self, publish):
+        """Cierra el contenedor y lo publica (publish=True) o lo descarta."""
+        ok = False
+        try:
+            self._finish()
+            ok = True
+        except Exception:
+            if publish:
+                raise
+        finally:
+            self.f.close()
+            if publish and ok:
+                os.replace(self.part, self.out_path)
+            else:
+                try:
+                    os.remove(self.part)
+                except OSError:
+                    pass
+
+    def _finish(self):
+        pass
+
+
+class _TiffContainer(_ContainerSink):
+    def __init__(self, out_path, opts):
+        super().__init__(out_path)
+        self.opts = opts
+        self.tiff = TiffStripWriter(self.f)
+
+    def _add(self, job, src):
+        self.tiff.append_tiff(src, self.opts)
+
+
+class _ZipContainer(_ContainerSink):
+    def __init__(self, out_path, opts):
+        super().__init__(out_path)
+        # Sin compresión: las imágenes ya van comprimidas
+        self.zip = zipfile.ZipFile(self.f, "w", zipfile.ZIP_STORED, allowZip64=True)
+
+    def _add(self, job, src):
+        info = zipfile.ZipInfo(job[1], time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_STORED
+        with self.zip.open(info, "w", force_zip64=True) as member:
+            shutil.copyfileobj(src, member, 1024 * 1024)
+
+    def _finish(self):
+        self.zip.close()
+
+
+def export_container(pdf_path, jobs, opts, out_path, container, workers=1, encoders=2,
+                     progress=None, cancel=None, stats=None):
+    """Exporta jobs = [(página, nombre)] a un único TIFF multipágina o ZIP sin comprimir.
+
+    Cada página se añade al contenedor en cuanto sale del pipeline, sin
+    acumular el conjunto. En TIFF las páginas se codifican siempre como TIFF
+    (deflate o Group 4 por página) y el nombre se ignora; en ZIP es el
+    nombre del archivo dentro del ZIP. Al cancelar se cierra y publica lo
+    escrito hasta ahí, que sigue siendo un archivo válido; si falla, se descarta.
+    """
+    if container == "TIFF":
+        opts = opts._replace(fmt="TIFF")
+    check_options(opts)
+    stats = stats if stats is not None else ExportStats()
+    sink = (_TiffContainer if container == "TIFF" else _ZipContainer)(out_path, opts)
+    publish = False
+    try:
+        count = export_pages(pdf_path, jobs, opts, workers=workers, encoders=encoders,
+                             progress=progress, cancel=cancel, stats=stats, sink=sink)
+        publish = True
+        return count
+    except ExportCancelled:
+        publish = stats.done > 0
+        raise
+    finally:
+        sink.close(publish)
+
+
+# ── Reexportación incremental ───────────────────────────────────────
+# Referencias indirectas "N G R", con la clave de diccionario que las precede
+_REF_RE = re.compile(rb"(/[^\s/<>\[\]()]+)?\s*\b(\d+)\s+\d+\s+R\b")
+# Claves que apuntan a otras páginas, anotaciones o acciones y no al dibujo
+_SKIP_KEYS = frozenset((b"/Parent", b"/P", b"/Dest", b"/A", b"/AA", b"/Annots",
+                        b"/Popup", b"/IRT", b"/B", b"/StructParent", b"/StructParents"))
+
+
+def _split_refs(doc, source, follow=True):
+    """Parte source en (trozos, xrefs); un xref es None si no se sigue."""
+    segs, refs = [], []
+    pos = 0
+    limit = doc.xref_length()
+    for m in _REF_RE.finditer(source):
+        segs.append(source[pos:m.start(2)])
+        pos = m.end()
+        xref = int(m.group(2))
+        ok = follow and m.group(1) not in _SKIP_KEYS and 0 < xref < limit
+        refs.append(xref if ok else None)
+    segs.append(source[pos:])
+    return segs, refs
+
+
+def _xref_node(doc, xref, memo):
+    """Datos locales de un objeto (sin seguir referencias), memorizados por xref."""
+    node = memo.get(xref)
+    if node is None:
+        source = doc.xref_object(xref, compressed=True).encode("latin-1", "replace")
+        segs, refs = _split_refs(doc, source)
+        raw = doc.xref_stream_raw(xref) if doc.xref_is_stream(xref) else None
+        memo[xref] = node = (segs, refs, hashlib.sha1(raw or b"").digest())
+    return node
+
+
+def _graph_digest(doc, source, memo):
+    """Huella de source y de todo lo que referencia, recorrida sin recursión.
+
+    Cada xref se sustituye por su orden de visita, así que renumerar el PDF
+    al guardarlo no invalida las páginas y los ciclos no se repiten.
+    """
+    segs, refs = _split_refs(doc, source.encode("latin-1", "replace"))
+    order = {}
+    stack = [r for r in reversed(refs) if r is not None]
+    while stack:
+        xref = stack.pop()
+        if xref in order:
+            continue
+        order[xref] = len(order)
+        stack.extend(r for r in reversed(_xref_node(doc, xref, memo)[1])
+                     if r is not None and r not in order)
+
+    h = hashlib.sha1()
+
+    def feed(segs, refs):
+        h.update(segs[0])
+        for xref, seg in zip(refs, segs[1:]):
+            h.update(b"R" if xref is None else b"@%d" % order[xref])
+            h.update(seg)
+
+    feed(segs, refs)
+    for xref in order:
+        node_segs, node_refs, stream = _xref_node(doc, xref, memo)
+        feed(node_segs, node_refs)
+        h.update(stream)
+    return h.digest()
+
+
+def _inherited_key(doc, xref, key):
+    """Valor de key en la página o, si falta, en sus /Pages ascendentes."""
+    seen = set()
+    while xref and xref not in seen:
+        seen.add(xref)
+        kind, value = doc.xref_get_key(xref, key)
+        if kind != "null":
+            return value
+        kind, parent = doc.xref_get_key(xref, "Parent")
+        xref = int(parent.split()[0]) if kind == "xref" else 0
+    return "null"
+
+
+def page_fingerprint(doc, page_idx, opts, memo):
+    """Huella de lo que se ve al rasterizar la página y de las opciones de exportación.
+
+    Cuenta los streams de contenido, los recursos efectivos (heredados
+    incluidos) con todo lo que alcanzan y la apariencia de las anotaciones;
+    los enlaces a otras páginas no cuentan.
+    """
+    page = doc[page_idx]
+    h = hashlib.sha1()
+    for xref in page.get_contents():
+        h.update(_xref_node(doc, xref, memo)[2])
+    h.update(_graph_digest(doc, _inherited_key(doc, page.xref, "Resources"), memo))
+    for xref, _, _ in page.annot_xrefs():
+        source = doc.xref_object(xref, compressed=True).encode("latin-1", "replace")
+        h.update(b"".join(_split_refs(doc, source, follow=False)[0]))
+        h.update(_graph_digest(doc, doc.xref_get_key(xref, "AP")[1], memo))
+    h.update(repr((tuple(page.mediabox), tuple(page.cropbox), page.rotation)).encode())
+    h.update(json.dumps(opts._asdict(), sort_keys=True).encode())
+    return h.hexdigest()
+
+
+class ExportManifest:
+    """Manifiesto de una carpeta exportada: huella de la página detrás de cada archivo."""
+
+    FILENAME = ".pdfstudio-export.json"
+
+    def __init__(self, folder):
+        self.path = os.path.join(folder, self.FILENAME)
+        self.folder = folder
+        self.pages = {}      # nombre de archivo -> huella
+        self._pending = {}   # huellas calculadas en plan(), aún sin exportar
+
+    @classmethod
+    def load(cls, folder):
+        manifest = cls(folder)
+        try:
+            with open(manifest.path, "r", encoding="utf-8") as f:
+                manifest.pages = dict(json.load(f).get("pages", {}))
+        except (OSError, ValueError, AttributeError):
+            pass
+        return manifest
+
+    def plan(self, pdf_path, jobs, opts, cancel=None):
+        """Devuelve solo los jobs cuya página cambió o cuyo archivo ya no existe."""
+        memo = {}
+        todo = []
+        for page_idx, out_path in jobs:
+            if cancel is not None and cancel.is_set():
+                raise ExportCancelled()
+            with get_doc_pool().document(pdf_path) as doc:
+                fp = page_fingerprint(doc, page_idx, opts, memo)
+            name = os.path.basename(out_path)
+            self._pending[name] = fp
+            if self.pages.get(name) != fp or not os.path.exists(out_path):
+                todo.append((page_idx, out_path))
+        return todo
+
+    def commit(self, jobs):
+        """Registra como exportados los jobs ya publicados."""
+        for _, out_path in jobs:
+            name = os.path.basename(out_path)
+            if name in self._pending:
+                self.pages[name] = self._pending[name]
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "pages": self.pages}, f, indent=0, sort_keys=True)
+        os.replace(tmp, self.path)
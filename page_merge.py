@@ -0,0 +1,145 @@
+# page_merge.py  –  Motores de fusión de PDFs (sin GUI: el de PyMuPDF corre en un proceso hijo)
+import multiprocessing
+import os
+import queue
+import tempfile
+
+import fitz  # PyMuPDF
+from pypdf import PdfReader, PdfWriter
+
+from render_cache import LruCache
+
+
+class MergeCancelled(Exception):
+    pass
+
+
+def coalesce_ranges(ranges):
+    """Une tramos (ruta, desde, hasta) contiguos del mismo origen."""
+    out = []
+    for path, frm, to in ranges:
+        if out and out[-1][0] == path and out[-1][2] + 1 == frm:
+            out[-1][2] = to
+        else:
+            out.append([path, frm, to])
+    return [tuple(r) for r in out]
+
+
+def merge_pages_pypdf(ranges, out_path, progress=None, cancel=None, max_readers=32):
+    """Fusión página a página con pypdf; como mucho max_readers orígenes abiertos."""
+    def open_reader(path):
+        fh = open(path, "rb")
+        try:
+            return PdfReader(fh), fh
+        except Exception:
+            fh.close()
+            raise
+
+    writer = PdfWriter()
+    readers = LruCache(max_items=max_readers, on_evict=lambda _k, entry: entry[1].close())
+    count = 0
+    try:
+        for path, frm, to in ranges:
+            for idx in range(frm, to + 1):
+                if cancel is not None and cancel.is_set():
+                    raise MergeCancelled()
+                entry = readers.get(path)
+                if entry is None:
+                    entry = open_reader(path)
+                    readers.put(path, entry)
+                writer.add_page(entry[0].pages[idx])
+                count += 1
+                if progress:
+                    progress(count)
+        with open(out_path, "wb") as f:
+            writer.write(f)
+    finally:
+        readers.clear()
+    return count
+
+
+def _merge_fitz_process(ranges, out_path, chunk, events, max_docs=32):
+    """Cuerpo de merge_pages_fitz en el proceso hijo; informa por `events`."""
+    try:
+        sources = LruCache(max_items=max_docs, on_evict=lambda _k, doc: doc.close())
+        dst = fitz.open()
+        count = 0
+        for path, frm, to in coalesce_ranges(ranges):
+            src = sources.get(path)
+            if src is None:
+                src = fitz.open(path)
+                sources.put(path, src)
+            for a in range(frm, to + 1, chunk):
+                b = min(a + chunk - 1, to)
+                dst.insert_pdf(src, from_page=a, to_page=b)
+                count += b - a + 1
+                events.put(("progress", count))
+        dst.save(out_path, garbage=4, deflate=True)
+        dst.close()
+        sources.clear()
+        events.put(("done", count))
+    except Exception as e:
+        events.put(("error", f"{type(e).__name__}: {e}"))
+
+
+def merge_pages_fitz(ranges, out_path, progress=None, cancel=None, chunk=250):
+    """Fusión por rangos con PyMuPDF (un insert_pdf por tramo) en un proceso aparte."""
+    ctx = multiprocessing.get_context("spawn")
+    events = ctx.Queue()
+    proc = ctx.Process(target=_merge_fitz_process, name="merge-fitz", daemon=True,
+                       args=([tuple(r) for r in ranges], out_path, chunk, events))
+    proc.start()
+    try:
+        while True:
+            if cancel is not None and cancel.is_set():
+                raise MergeCancelled()
+            try:
+                kind, value = events.get(timeout=0.1)
+            except queue.Empty:
+                if proc.is_alive():
+                    continue
+                try:
+                    kind, value = events.get_nowait()
+                except queue.Empty:
+                    raise RuntimeError(
+                        f"El proceso de fusión terminó inesperadamente (código {proc.exitcode}).")
+            if kind == "progress":
+                if progress:
+                    progress(value)
+            elif kind == "done":
+                return value
+            else:
+                raise RuntimeError(value)
+    finally:
+        if proc.is_alive():
+            proc.terminate()
+        proc.join()
+
+
+def run_merge(engine, ranges, out_path, progress=None, cancel=None):
+    """Fusiona en un temporal junto al destino y lo renombra solo si termina bien."""
+    out_dir = os.path.dirname(os.path.abspath(out_path))
+    fd, tmp = tempfile.mkstemp(prefix=".merge-", suffix=".pdf.tmp", dir=out_dir)
+    os.close(fd)
+    try:
+        count = engine(ranges, tmp, progress=progress, cancel=cancel)
+        # mkstemp crea el archivo con permisos 0600; se conservan los del destino
+        try:
+            mode = os.stat(out_path).st_mode & 0o777
+        except OSError:
+            mode = 0o644
+        os.chmod(tmp, mode)
+        os.replace(tmp, out_path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return count
+
+
+MERGE_ENGINES = {
+    "PyMuPDF": merge_pages_fitz,
+    "pypdf": merge_pages_pypdf,
+}
@@ -0,0 +1,134 @@
+# page_render.py  –  Raster de páginas PDF en procesos hijos (sin GUI)
+import multiprocessing
+import os
+import threading
+import time
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+from render_cache import LruCache
+
+# PyMuPDF no suelta el GIL en get_pixmap: un hilo que renderiza una página
+# pesada congela la interfaz todo lo que dure el render, así que los hilos no
+# dan concurrencia con fitz. El raster se hace en procesos hijos y los hilos
+# del proceso principal solo esperan el resultado.
+MAX_IDLE_CHILDREN = 2   # procesos ociosos que se conservan para reutilizar
+KILL_GRACE = 0.3        # segundos que se espera a un render obsoleto antes de matarlo
+
+
+class _RenderStale(Exception):
+    """El render dejó de hacer falta mientras se esperaba."""
+
+
+def _child_page(docs, source, page_idx):
+    """(display list, rect) de una página en el hijo; documentos y páginas quedan en caché."""
+    if isinstance(source, str):
+        st = os.stat(source)
+        key = (source, st.st_mtime_ns, st.st_size)
+    else:
+        key = source[0]
+    entry = docs.get(key)
+    if entry is None:
+        doc = fitz.open(source) if isinstance(source, str) else fitz.open("pdf", source[1])
+        entry = (doc, LruCache(max_items=16))
+        docs.put(key, entry)
+    doc, pages = entry
+    page = pages.get(page_idx)
+    if page is None:
+        p = doc[page_idx]
+        page = (p.get_displaylist(), p.rect)
+        pages.put(page_idx, page)
+    return page
+
+
+def _child_main(conn):
+    """Bucle del proceso hijo: atiende peticiones (fuente, página, escala, recorte)."""
+    docs = LruCache(max_items=4, on_evict=lambda _k, entry: entry[0].close())
+    while True:
+        try:
+            source, page_idx, scale, clip = conn.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            dl, rect = _child_page(docs, source, page_idx)
+            area = None
+            if clip is not None:
+                x0, y0, x1, y1 = clip
+                area = fitz.Rect(rect.x0 + x0, rect.y0 + y0, rect.x0 + x1, rect.y0 + y1)
+            pix = dl.get_pixmap(matrix=fitz.Matrix(scale, scale), clip=area, alpha=False)
+            conn.send(("ok", (pix.width, pix.height, pix.samples)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class _RenderChild:
+    """Un proceso hijo de render y su extremo de la tubería."""
+
+    def __init__(self):
+        ctx = multiprocessing.get_context("spawn")
+        self.conn, child_conn = ctx.Pipe()
+        self.proc = ctx.Process(target=_child_main, args=(child_conn,), name="page-render",
+                                daemon=True)
+        self.proc.start()
+        child_conn.close()
+
+    def render(self, request, stale):
+        self.conn.send(request)
+        stale_since = None
+        while not self.conn.poll(0.05):
+            if not self.proc.is_alive():
+                raise RuntimeError(
+                    f"El proceso de render terminó inesperadamente (código {self.proc.exitcode}).")
+            # Obsoleto: se deja terminar si acaba enseguida, si no se mata el hijo
+            if stale_since is None:
+                if stale is not None and stale():
+                    stale_since = time.monotonic()
+            elif time.monotonic() - stale_since > KILL_GRACE:
+                raise _RenderStale()
+        kind, value = self.conn.recv()
+        if kind == "error":
+            raise RuntimeError(value)
+        return value
+
+    def close(self):
+        self.conn.close()
+        if self.proc.is_alive():
+            self.proc.terminate()
+        self.proc.join()
+
+
+_idle = []
+_idle_lock = threading.Lock()
+
+
+def render_page(source, page_idx, scale, clip=None, stale=None):
+    """Rasteriza la página de source (ruta o (clave, bytes)) en un hijo; None si stale() se cumple."""
+    with _idle_lock:
+        child = _idle.pop() if _idle else None
+    if child is None:
+        child = _RenderChild()
+    try:
+        width, height, samples = child.render((source, page_idx, scale, clip), stale)
+    except _RenderStale:
+        child.close()
+        return None
+    except BaseException:
+        child.close()
+        raise
+    with _idle_lock:
+        if len(_idle) < MAX_IDLE_CHILDREN:
+            _idle.append(child)
+            child = None
+    if child is not None:
+        child.close()
+    return Image.frombytes("RGB", (width, height), samples)
+
+
+def shutdown():
+    """Cierra los procesos hijos ociosos."""
+    with _idle_lock:
+        children = _idle[:]
+        _idle.clear()
+    for child in children:
+        child.close()
@@ -0,0 +1,279 @@
+# render_cache.py  –  Cachés compartidas entre pestañas (miniaturas, documentos abiertos)
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+import fitz  # PyMuPDF
+
+
+# PyMuPDF no es thread-safe: todo uso concurrente de fitz se serializa aquí
+FITZ_LOCK = threading.RLock()
+
+
+def default_cache_dir():
+    base = (os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME")
+            or os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(base, "PDFStudioPro", "thumbs")
+
+
+# Rectángulo "x0,y0,x1,y1" del contenido dentro del relleno de una miniatura;
+# viaja en im.info y se guarda como texto en el PNG de la caché
+THUMB_BOX_KEY = "content_box"
+
+
+def thumbnail_content(im):
+    """Contenido de una miniatura sin el relleno, o None si no consta dónde está."""
+    try:
+        x0, y0, x1, y1 = (int(v) for v in im.info[THUMB_BOX_KEY].split(","))
+    except (KeyError, AttributeError, ValueError):
+        return None
+    return im.crop((x0, y0, x1, y1))
+
+
+def image_nbytes(im):
+    """Tamaño aproximado en memoria de una imagen PIL decodificada."""
+    return im.size[0] * im.size[1] * len(im.getbands())
+
+
+# ── LRU en memoria ──────────────────────────────────────────────────
+class LruCache:
+    """LRU en memoria acotada por número de entradas y/o bytes. Segura entre hilos.
+
+    on_evict(key, value) se llama fuera del lock al expulsar una entrada.
+    """
+
+    def __init__(self, max_items=None, max_bytes=None, sizeof=None, on_evict=None):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or (lambda _v: 0)
+        self._on_evict = on_evict
+        self._data = OrderedDict()  # key -> (value, nbytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            self._data.move_to_end(key)
+            return item[0]
+
+    def put(self, key, value):
+        nbytes = self._sizeof(value)
+        evicted = []
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+                if old[0] is not value:
+                    evicted.append((key, old[0]))
+            self._data[key] = (value, nbytes)
+            self._bytes += nbytes
+            while len(self._data) > 1 and (
+                    (self.max_items is not None and len(self._data) > self.max_items)
+                    or (self.max_bytes is not None and self._bytes > self.max_bytes)):
+                k, (v, sz) = self._data.popitem(last=False)
+                self._bytes -= sz
+                evicted.append((k, v))
+        self._notify(evicted)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, None)
+            if item is None:
+                return default
+            self._bytes -= item[1]
+        self._notify([(key, item[0])])
+        return item[0]
+
+    def clear(self):
+        with self._lock:
+            evicted = [(k, v) for k, (v, _) in self._data.items()]
+            self._data.clear()
+            self._bytes = 0
+        self._notify(evicted)
+
+    def _notify(self, evicted):
+        if self._on_evict:
+            for k, v in evicted:
+                self._on_evict(k, v)
+
+
+# ── Miniaturas en disco ─────────────────────────────────────────────
+class ThumbnailCache:
+    """Caché persistente de miniaturas con tope de tamaño y expulsión LRU.
+
+    La clave es (ruta, tamaño, mtime, índice de página, tamaño de miniatura y,
+    para páginas PDF, escala de render): si el archivo cambia, la clave cambia
+    y la entrada vieja termina expulsada.
+    Es seguro usarla desde hilos de trabajo.
+    """
+
+    def __init__(self, root=None, max_bytes=256 * 1024 * 1024):
+        self.root = root or default_cache_dir()
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total = None  # bytes en disco; se calcula al primer put()
+
+    def _key(self, path, page_idx, thumb_size, scale=None):
+        st = os.stat(path)
+        raw = (f"{os.path.normcase(os.path.abspath(path))}|{st.st_size}|"
+               f"{st.st_mtime_ns}|{page_idx}|{thumb_size}")
+        if scale is not None:
+            raw += f"|{scale:g}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.root, key[:2], key + ".png")
+
+    def get(self, path, page_idx, thumb_size, scale=None):
+        try:
+            fn = self._entry_path(self._key(path, page_idx, thumb_size, scale))
+            with Image.open(fn) as im:
+                out = im.convert("RGB")
+            os.utime(fn)  # marca de uso para LRU
+            return out
+        except (OSError, ValueError):
+            return None
+
+    def put(self, path, page_idx, thumb_size, im, scale=None):
+        try:
+            fn = self._entry_path(self._key(path, page_idx, thumb_size, scale))
+            os.makedirs(os.path.dirname(fn), exist_ok=True)
+            tmp = f"{fn}.{threading.get_ident()}.tmp"
+            meta = PngInfo()
+            for k, v in im.info.items():
+                if isinstance(v, str):
+                    meta.add_text(k, v)
+            im.save(tmp, "PNG", pnginfo=meta)
+            size = os.path.getsize(tmp)
+            os.replace(tmp, fn)
+        except OSError:
+            return
+        with self._lock:
+            if self._total is None:
+                self._total = self._scan_total()
+            else:
+                self._total += size
+            if self._total > self.max_bytes:
+                self._evict(int(self.max_bytes * 0.8))
+
+    def get_or_create(self, path, page_idx, thumb_size, factory, scale=None):
+        """Devuelve la miniatura cacheada o la genera con factory() y la guarda."""
+        im = self.get(path, page_idx, thumb_size, scale)
+        if im is None:
+            im = factory()
+            self.put(path, page_idx, thumb_size, im, scale)
+        return im
+
+    def _entries(self):
+        try:
+            shards = list(os.scandir(self.root))
+        except OSError:
+            return
+        for shard in shards:
+            if not shard.is_dir():
+                continue
+            try:
+                for e in os.scandir(shard.path):
+                    if e.name.endswith(".png"):
+                        yield e
+            except OSError:
+                continue
+
+    def _scan_total(self):
+        total = 0
+        for e in self._entries():
+            try:
+                total += e.stat().st_size
+            except OSError:
+                pass
+        return total
+
+    def _evict(self, target):
+        entries = []
+        for e in self._entries():
+            try:
+                st = e.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, e.path))
+        entries.sort()
+        total = sum(sz for _, sz, _ in entries)
+        for _, sz, fn in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(fn)
+                total -= sz
+            except OSError:
+                pass
+        self._total = total
+
+
+_thumb_cache = None
+_singleton_lock = threading.Lock()
+
+
+def get_thumb_cache():
+    global _thumb_cache
+    with _singleton_lock:
+        if _thumb_cache is None:
+            _thumb_cache = ThumbnailCache()
+        return _thumb_cache
+
+
+# ── Documentos abiertos ─────────────────────────────────────────────
+class DocumentPool:
+    """Pool acotado de fitz.Document abiertos, compartido entre pestañas.
+
+    Se expulsa el menos usado recientemente y un documento se reabre si
+    cambia el tamaño o el mtime del archivo. Uso:
+
+        with get_doc_pool().document(path) as doc:
+            ...
+
+    El bloque se ejecuta con FITZ_LOCK tomado, así que no hay que guardar
+    el documento fuera de él.
+    """
+
+    def __init__(self, max_docs=12):
+        self._docs = LruCache(max_items=max_docs, on_evict=lambda _k, entry: entry[0].close())
+
+    @contextmanager
+    def document(self, path):
+        with FITZ_LOCK:
+            key = os.path.normcase(os.path.abspath(path))
+            st = os.stat(path)
+            sig = (st.st_size, st.st_mtime_ns)
+            entry = self._docs.get(key)
+            if entry is None or entry[1] != sig:
+                entry = (fitz.open(path), sig)
+                self._docs.put(key, entry)
+            yield entry[0]
+
+    def clear(self):
+        with FITZ_LOCK:
+            self._docs.clear()
+
+
+_doc_pool = None
+
+
+def get_doc_pool():
+    global _doc_pool
+    with _singleton_lock:
+        if _doc_pool is None:
+            _doc_pool = DocumentPool()
+        return _doc_pool